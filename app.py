@@ -1,13 +1,25 @@
 """Flask blog application"""
+import time
+_import_started = time.perf_counter()
+
 import os
 import logging
 from datetime import datetime
-from flask import Flask, render_template, send_from_directory
+from flask import Flask, render_template, request
 from werkzeug.wrappers import Response
 from utils.db import init_db, init_app as init_db_app
 from utils.scheduler import init_scheduler
+from utils.render_cache import render_cache
+from utils.http_cache import compute_build_id, find_template_assets
+from services.asset_service import asset_matches_disk, asset_url, get_asset, refresh_asset_manifest
+from utils.compression import response_cache, send_static
+from utils.page_cache import init_page_cache
+from utils.metrics import init_metrics
+from utils.highlight import configure_highlight_cache
 import config
 
+IMPORT_SECONDS = time.perf_counter() - _import_started
+
 # Silence noisy loggers
 logging.getLogger('apscheduler').setLevel(logging.WARNING)
 
@@ -16,7 +28,17 @@ logger = logging.getLogger(__name__)
 
 def create_app(test_config: dict | None = None) -> Flask:
     """Application factory"""
-    app = Flask(__name__, instance_relative_config=True)
+    started = time.perf_counter()
+    timings: dict[str, float] = {}
+
+    def mark(phase: str) -> None:
+        nonlocal started
+        now = time.perf_counter()
+        timings[phase] = now - started
+        started = now
+
+    # Static files are served by static_files below so STATIC_DIR is honoured
+    app = Flask(__name__, instance_relative_config=True, static_folder=None)
     
     base_dir = os.path.dirname(__file__)
     data_dir = os.path.join(base_dir, config.DATA_DIRECTORY)
@@ -24,9 +46,45 @@ def create_app(test_config: dict | None = None) -> Flask:
     app.config.from_mapping(
         SECRET_KEY=os.environ.get('SECRET_KEY', 'dev'),
         DATABASE=os.path.join(data_dir, config.DB_FILENAME),
+        ASSET_MANIFEST=os.path.join(data_dir, 'assets.json'),
+        COMPRESSED_DIR=os.path.join(data_dir, 'compressed'),
+        PAGE_CACHE_PATH=os.path.join(data_dir, 'page_cache.db'),
+        HIGHLIGHT_CACHE_PATH=os.path.join(data_dir, 'highlight.db'),
         POSTS_DIR=os.path.join(base_dir, config.POSTS_DIRECTORY),
         POSTS_PER_PAGE=config.POSTS_PER_PAGE,
-        STATIC_DIR=os.path.join(base_dir, 'static')
+        DB_POOL_SIZE=config.DB_POOL_SIZE,
+        DB_STATEMENT_CACHE=config.DB_STATEMENT_CACHE,
+        DB_BUSY_TIMEOUT=config.DB_BUSY_TIMEOUT,
+        SQLITE_JOURNAL_MODE=config.SQLITE_JOURNAL_MODE,
+        SQLITE_PRAGMAS=config.SQLITE_PRAGMAS,
+        RENDER_CACHE_MAX_BYTES=config.RENDER_CACHE_MAX_BYTES,
+        CACHE_CONTROL=config.CACHE_CONTROL,
+        ICON_INLINE_MAX_BYTES=config.ICON_INLINE_MAX_BYTES,
+        ICON_INDEX_CHECK_SECONDS=config.ICON_INDEX_CHECK_SECONDS,
+        IMAGE_VARIANT_WIDTHS=config.IMAGE_VARIANT_WIDTHS,
+        IMAGE_VARIANT_QUALITY=config.IMAGE_VARIANT_QUALITY,
+        IMMUTABLE_CACHE_CONTROL=config.IMMUTABLE_CACHE_CONTROL,
+        RESPONSE_CACHE_MAX_BYTES=config.RESPONSE_CACHE_MAX_BYTES,
+        COMPRESS_MIN_BYTES=config.COMPRESS_MIN_BYTES,
+        GZIP_LEVEL=config.GZIP_LEVEL,
+        BROTLI_QUALITY=config.BROTLI_QUALITY,
+        STREAM_MIN_BYTES=config.STREAM_MIN_BYTES,
+        STREAM_CHUNK_BYTES=config.STREAM_CHUNK_BYTES,
+        PAGE_CACHE=config.PAGE_CACHE,
+        HIGHLIGHT_CACHE=config.HIGHLIGHT_CACHE,
+        HIGHLIGHT_CACHE_MAX_ENTRIES=config.HIGHLIGHT_CACHE_MAX_ENTRIES,
+        SYNC_JOBS=config.SYNC_JOBS,
+        GENERATION_CHECK_SECONDS=config.GENERATION_CHECK_SECONDS,
+        PAGE_CACHE_ROUTES=config.PAGE_CACHE_ROUTES,
+        PAGE_CACHE_QUERY_ARGS=config.PAGE_CACHE_QUERY_ARGS,
+        PAGE_CACHE_MAX_BYTES=config.PAGE_CACHE_MAX_BYTES,
+        METRICS_ENABLED=config.METRICS_ENABLED,
+        METRICS_BUCKETS=config.METRICS_BUCKETS,
+        STATIC_DIR=os.path.join(base_dir, 'static'),
+        # Set by export_site.py: pages link to the files it writes instead of query URLs
+        STATIC_EXPORT=False,
+        # Off under gunicorn --preload: gunicorn.conf.py starts sync after fork
+        SYNC_AUTOSTART=os.environ.get('SYNC_AUTOSTART', '1') != '0'
     )
 
     if test_config is None:
@@ -40,14 +98,38 @@ def create_app(test_config: dict | None = None) -> Flask:
                       app.config['POSTS_DIR']]:
         os.makedirs(directory, exist_ok=True)
     
+    mark('config')
+    app.config.setdefault('BUILD_ID', compute_build_id(app))
+    app.config.setdefault('TEMPLATE_ASSETS', find_template_assets(app))
+    render_cache.max_bytes = app.config['RENDER_CACHE_MAX_BYTES']
+    response_cache.max_bytes = app.config['RESPONSE_CACHE_MAX_BYTES']
+    init_metrics(app)
+    configure_highlight_cache(app.config['HIGHLIGHT_CACHE_PATH'] if app.config['HIGHLIGHT_CACHE'] else None)
     init_db_app(app)
     
     with app.app_context():
         init_db()
+        if app.config['PAGE_CACHE']:
+            init_page_cache()
+    
+    mark('database')
+    
+    # The icon index is built by the first /icon request, not at boot
+    if not os.path.exists(app.config['ASSET_MANIFEST']):
+        refresh_asset_manifest(app.config['STATIC_DIR'], app.config['ASSET_MANIFEST'])
+    app.jinja_env.globals['asset_url'] = asset_url
+    mark('assets')
 
     @app.route('/static/<path:filename>')
     def static_files(filename: str) -> Response:
-        return send_from_directory(app.config['STATIC_DIR'], filename)
+        asset = get_asset(filename)
+        response = send_static(app.config['STATIC_DIR'], filename, asset)
+        version = request.args.get('v')
+        if (version and asset and version == asset['hash']
+                and asset_matches_disk(app.config['STATIC_DIR'], filename, asset)):
+            # Fingerprinted URL whose file is still what was hashed: the content behind it never changes
+            response.headers['Cache-Control'] = app.config['IMMUTABLE_CACHE_CONTROL']
+        return response
 
     @app.context_processor
     def inject_config() -> dict:
@@ -85,9 +167,20 @@ def create_app(test_config: dict | None = None) -> Flask:
     
     from routes import register_blueprints
     register_blueprints(app)
+    mark('routes')
     
     init_scheduler(app)
+    mark('scheduler')
     
+    app.extensions['startup_timings'] = {
+        'imports': round(IMPORT_SECONDS * 1000, 2),
+        **{phase: round(seconds * 1000, 2) for phase, seconds in timings.items()},
+    }
+    logger.info(
+        f"Startup in {sum(timings.values()) * 1000:.1f} ms (pid {os.getpid()}, imports "
+        f"{IMPORT_SECONDS * 1000:.1f} ms): "
+        + ', '.join(f"{phase} {seconds * 1000:.2f} ms" for phase, seconds in timings.items())
+    )
     return app
 
 
@@ -0,0 +1,5 @@
+"""
+Performance benchmarks, run from the repository root, e.g.
+    python -m benchmarks.bench_markdown
+    python -m benchmarks.suite --posts 500 --output before.json
+"""
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: per-render overhead of a fresh markdown.markdown() call
+versus the cached per-thread converter used by render_markdown.
+
+Usage:
+    python -m benchmarks.bench_markdown [--iterations N]
+"""
+import sys
+import time
+import argparse
+import markdown
+import config
+from utils.markdown_parser import get_converter
+
+SAMPLES = {
+    'tiny': "# Hello\n\nJust a line of *text*.\n",
+    'code': "# Code\n\n" + "Some prose here.\n\n```python\nfor i in range(10):\n    print(i)\n```\n\n" * 5,
+    'long': "# Long\n\n" + "A paragraph with **bold** and [a link](http://example.com).\n\n" * 200,
+}
+
+
+def _fresh(text: str) -> str:
+    return markdown.markdown(
+        text, extensions=config.MARKDOWN_EXTENSIONS,
+        extension_configs=config.MARKDOWN_EXTENSION_CONFIGS
+    )
+
+
+def _cached(text: str) -> str:
+    md = get_converter()
+    try:
+        return md.convert(text)
+    finally:
+        md.reset()
+
+
+def _time_per_call(func, text: str, iterations: int) -> float:
+    func(text)
+    started = time.perf_counter()
+    for _ in range(iterations):
+        func(text)
+    return (time.perf_counter() - started) / iterations
+
+
+def main() -> int:
+    """Print per-render time for each sample, fresh vs cached"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--iterations', '-n', type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'sample':<8} {'fresh (us)':>12} {'cached (us)':>12} {'saved (us)':>12}")
+    for name, text in SAMPLES.items():
+        assert _fresh(text) == _cached(text), f"output differs for {name}"
+        fresh = _time_per_call(_fresh, text, args.iterations) * 1e6
+        cached = _time_per_call(_cached, text, args.iterations) * 1e6
+        print(f"{name:<8} {fresh:>12.1f} {cached:>12.1f} {fresh - cached:>12.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
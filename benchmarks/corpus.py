@@ -0,0 +1,76 @@
+"""Synthetic blog content for benchmarks: posts, images and icons"""
+import os
+import random
+from datetime import date, timedelta
+from PIL import Image
+
+WORDS = (
+    "the of and to in is that for it as with was on be by this are from at "
+    "performance cache render request worker sqlite markdown template latency "
+    "throughput image post blog static index query page build deploy server"
+).split()
+
+IDENTIFIERS = ['rows', 'post', 'cache', 'page', 'worker', 'result', 'query', 'index', 'item', 'entry']
+
+
+def _paragraph(rng: random.Random, words: int) -> str:
+    text = ' '.join(rng.choice(WORDS) for _ in range(words))
+    return text[0].upper() + text[1:] + '.'
+
+
+def _code_block(rng: random.Random) -> str:
+    """A distinct fenced Python block, so each one costs a highlight the first time it is rendered"""
+    name, arg, var = rng.sample(IDENTIFIERS, 3)
+    lines = [f"def {name}_{rng.randrange(10000)}({arg}, limit={rng.randrange(1, 100)}):",
+             f"    {var} = db.execute(\"SELECT * FROM {rng.choice(WORDS)} WHERE id = ?\", [{arg}.id])"]
+    for _ in range(rng.randrange(2, 6)):
+        lines.append(f"    {rng.choice(IDENTIFIERS)} = {rng.choice(IDENTIFIERS)}.get({rng.randrange(1000)!r}, {var})")
+    lines.append(f"    return [render(r, cache={rng.choice(['True', 'False'])}) for r in {var}][:limit]")
+    return '```python\n' + '\n'.join(lines) + '\n```'
+
+
+def _post(rng: random.Random, index: int, words: int, code_blocks: int, images: list[str]) -> str:
+    day = date(2020, 1, 1) + timedelta(days=index)
+    blocks = [f"# Benchmark post {index}", day.isoformat()]
+    paragraphs = max(1, words // 60)
+    code_at = set(rng.sample(range(paragraphs), min(code_blocks, paragraphs)))
+    for i in range(paragraphs):
+        blocks.append(_paragraph(rng, 60))
+        if i in code_at:
+            blocks.append(_code_block(rng))
+        if images and i == paragraphs // 2:
+            blocks.append(f"![figure {index}]({rng.choice(images)})")
+    if rng.random() < 0.3:
+        blocks.append("| key | value |\n|-----|-------|\n| a | 1 |\n| b | 2 |")
+    return '\n\n'.join(blocks) + '\n'
+
+
+def _write_image(path: str, size: tuple[int, int], rng: random.Random) -> None:
+    image = Image.new('RGB', size, tuple(rng.randrange(256) for _ in range(3)))
+    image.save(path)
+
+
+def generate_corpus(root: str, posts: int = 200, words: int = 800, code_blocks: int = 2,
+                    images: int = 10, icons: int = 5, seed: int = 0) -> dict:
+    """Write posts/, static/images/ and static/icons/ under root; return the parameters used"""
+    rng = random.Random(seed)
+    posts_dir = os.path.join(root, 'posts')
+    images_dir = os.path.join(root, 'static', 'images')
+    icons_dir = os.path.join(root, 'static', 'icons')
+    for directory in (posts_dir, images_dir, icons_dir):
+        os.makedirs(directory, exist_ok=True)
+
+    image_names = []
+    for i in range(images):
+        name = f"figure-{i}.png"
+        _write_image(os.path.join(images_dir, name), (1600, 900), rng)
+        image_names.append(name)
+    for i in range(icons):
+        _write_image(os.path.join(icons_dir, f"icon-{i}.png"), (64, 64), rng)
+
+    for i in range(posts):
+        with open(os.path.join(posts_dir, f"post-{i:05d}.md"), 'w', encoding='utf-8') as f:
+            f.write(_post(rng, i, words, code_blocks, image_names))
+
+    return {'posts': posts, 'words': words, 'code_blocks': code_blocks,
+            'images': images, 'icons': icons, 'seed': seed}
@@ -0,0 +1,31 @@
+"""WSGI entry point for benchmarking under gunicorn against a generated corpus.
+
+The workspace comes from BENCH_WORKSPACE (see benchmarks.suite):
+    BENCH_WORKSPACE=/tmp/bench gunicorn -w 4 'benchmarks.server:create_bench_app()'
+"""
+import os
+import json
+from flask import Flask
+from app import create_app
+
+
+def bench_config(workspace: str) -> dict:
+    """App config pointing every path into the benchmark workspace"""
+    data_dir = os.path.join(workspace, 'data')
+    config = {
+        'DATABASE': os.path.join(data_dir, 'blog.db'),
+        'ASSET_MANIFEST': os.path.join(data_dir, 'assets.json'),
+        'COMPRESSED_DIR': os.path.join(data_dir, 'compressed'),
+        'PAGE_CACHE_PATH': os.path.join(data_dir, 'page_cache.db'),
+        'HIGHLIGHT_CACHE_PATH': os.path.join(data_dir, 'highlight.db'),
+        'POSTS_DIR': os.path.join(workspace, 'posts'),
+        'STATIC_DIR': os.path.join(workspace, 'static'),
+        'SYNC_MODE': 'off',
+    }
+    config.update(json.loads(os.environ.get('BENCH_CONFIG', '{}')))
+    return config
+
+
+def create_bench_app() -> Flask:
+    """Application factory for gunicorn"""
+    return create_app(bench_config(os.environ['BENCH_WORKSPACE']))
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite: parsing, sync and request paths over a synthetic corpus.
+
+Generates posts/images/icons in a temporary workspace, then measures
+render_markdown, extract_metadata, sync_posts_to_db and the latency and
+throughput of /, /post/<slug>, /load_posts and /icon through the Flask
+test client and under a local multi-worker gunicorn. Results are written
+as JSON; --compare prints the change against an earlier report.
+
+Usage:
+    python -m benchmarks.suite [--posts N] [--output report.json] [--compare old.json]
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import socket
+import platform
+import argparse
+import tempfile
+import statistics
+import subprocess
+import http.client
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+from benchmarks.corpus import generate_corpus
+from benchmarks.server import bench_config
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Keys whose values are compared across reports; lower is better except rps
+COMPARED_KEYS = {'mean_ms', 'p50_ms', 'p95_ms', 'seconds', 'rps'}
+
+
+def _stats(samples: list[float]) -> dict:
+    """Latency summary in milliseconds for samples in seconds"""
+    ms = sorted(s * 1000 for s in samples)
+    pick = lambda q: ms[min(len(ms) - 1, int(q * len(ms)))]
+    return {
+        'count': len(ms), 'mean_ms': round(statistics.fmean(ms), 3), 'p50_ms': round(pick(0.5), 3),
+        'p95_ms': round(pick(0.95), 3), 'p99_ms': round(pick(0.99), 3), 'max_ms': round(ms[-1], 3),
+    }
+
+
+def _git_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def bench_parsing(posts_dir: str, iterations: int) -> dict:
+    """Per-post cost of render_markdown and extract_metadata, highlighting every code block afresh"""
+    from utils.markdown_parser import read_markdown_file, render_markdown, extract_metadata
+    from utils.highlight import prune_highlight_cache
+
+    files = sorted(os.listdir(posts_dir))[:iterations]
+    contents = [(os.path.join(posts_dir, f), read_markdown_file(os.path.join(posts_dir, f))) for f in files]
+    results = {}
+    for name, func in (('render_markdown', lambda path, text: render_markdown(text)),
+                       ('extract_metadata', lambda path, text: extract_metadata(text, path))):
+        func(*contents[0])
+        prune_highlight_cache(0)
+        samples = []
+        for path, text in contents:
+            started = time.perf_counter()
+            func(path, text)
+            samples.append(time.perf_counter() - started)
+        results[name] = _stats(samples)
+    return results
+
+
+def bench_sync(app, posts_dir: str, jobs: int) -> dict:
+    """Cold full sync, no-op resync, and resync after touching a tenth of the posts"""
+    from services.sync_service import sync_posts_to_db
+    from utils.highlight import prune_highlight_cache
+
+    def timed() -> dict:
+        started = time.perf_counter()
+        with app.app_context():
+            ok = sync_posts_to_db(jobs=jobs)
+        return {'seconds': round(time.perf_counter() - started, 4), 'ok': ok}
+
+    # Cold means no highlighted block cached, whatever bench_parsing stored
+    prune_highlight_cache(0)
+    results = {'cold': timed(), 'unchanged': timed()}
+    files = sorted(os.listdir(posts_dir))
+    for name in files[::10]:
+        with open(os.path.join(posts_dir, name), 'a', encoding='utf-8') as f:
+            f.write('\nEdited for the benchmark.\n')
+    results['edited_10pct'] = timed()
+    results['jobs'] = jobs
+    return results
+
+
+def _endpoints(posts_dir: str) -> dict[str, str]:
+    slug = os.path.splitext(sorted(os.listdir(posts_dir))[0])[0]
+    return {'home': '/', 'post': f'/post/{slug}', 'load_posts': '/load_posts?limit=10', 'icon': '/icon'}
+
+
+def bench_test_client(app, endpoints: dict[str, str], requests: int) -> dict:
+    """In-process latency per endpoint: first request, then warm requests"""
+    client = app.test_client()
+    results = {}
+    for name, url in endpoints.items():
+        started = time.perf_counter()
+        response = client.get(url)
+        first = time.perf_counter() - started
+        if response.status_code != 200:
+            raise RuntimeError(f"{url} returned {response.status_code}")
+        samples = []
+        for _ in range(requests):
+            started = time.perf_counter()
+            client.get(url, headers={'Accept-Encoding': 'gzip, br'})
+            samples.append(time.perf_counter() - started)
+        results[name] = {'first_ms': round(first * 1000, 3), **_stats(samples)}
+        results[name]['rps'] = round(len(samples) / sum(samples), 1)
+    return results
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _get(port: int, url: str) -> float:
+    started = time.perf_counter()
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    try:
+        conn.request('GET', url, headers={'Accept-Encoding': 'gzip, br'})
+        response = conn.getresponse()
+        response.read()
+        if response.status != 200:
+            raise RuntimeError(f"{url} returned {response.status}")
+    finally:
+        conn.close()
+    return time.perf_counter() - started
+
+
+def bench_gunicorn(workspace: str, endpoints: dict[str, str], workers: int,
+                   concurrency: int, requests: int) -> dict:
+    """Latency and throughput per endpoint against gunicorn with several workers"""
+    port = _free_port()
+    env = {**os.environ, 'BENCH_WORKSPACE': workspace}
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-w', str(workers), '-b', f'127.0.0.1:{port}',
+         '--log-level', 'warning', 'benchmarks.server:create_bench_app()'],
+        cwd=REPO_DIR, env=env
+    )
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                _get(port, '/')
+                break
+            except (OSError, RuntimeError):
+                if server.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError("gunicorn did not start")
+                time.sleep(0.2)
+
+        results = {'workers': workers, 'concurrency': concurrency}
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            for name, url in endpoints.items():
+                list(pool.map(lambda _: _get(port, url), range(concurrency)))
+                started = time.perf_counter()
+                samples = list(pool.map(lambda _: _get(port, url), range(requests)))
+                elapsed = time.perf_counter() - started
+                results[name] = {**_stats(samples), 'rps': round(len(samples) / elapsed, 1)}
+        return results
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def _flatten(report: dict, prefix: str = '') -> dict[str, float]:
+    values = {}
+    for key, value in report.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            values.update(_flatten(value, f"{path}."))
+        elif key in COMPARED_KEYS and isinstance(value, (int, float)):
+            values[path] = value
+    return values
+
+
+def compare(old: dict, new: dict) -> None:
+    """Print the relative change of every timing present in both reports"""
+    before, after = _flatten(old), _flatten(new)
+    print(f"\n{'metric':<44} {'before':>10} {'after':>10} {'change':>8}")
+    for key in sorted(before.keys() & after.keys()):
+        if before[key]:
+            change = (after[key] - before[key]) / before[key] * 100
+            print(f"{key:<44} {before[key]:>10.2f} {after[key]:>10.2f} {change:>+7.1f}%")
+
+
+def main() -> int:
+    """Generate a corpus, run every benchmark and write the JSON report"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--posts', type=int, default=200, help='number of posts to generate')
+    parser.add_argument('--words', type=int, default=800, help='approximate words per post')
+    parser.add_argument('--code-blocks', type=int, default=2, help='fenced code blocks per post')
+    parser.add_argument('--images', type=int, default=10, help='images generated and embedded')
+    parser.add_argument('--requests', '-n', type=int, default=200, help='requests per endpoint')
+    parser.add_argument('--jobs', type=int, default=1, help='sync worker processes')
+    parser.add_argument('--workers', type=int, default=4, help='gunicorn workers')
+    parser.add_argument('--concurrency', '-c', type=int, default=8, help='concurrent gunicorn clients')
+    parser.add_argument('--no-gunicorn', action='store_true', help='skip the gunicorn benchmark')
+    parser.add_argument('--output', '-o', default='benchmark-report.json', help='report path')
+    parser.add_argument('--compare', metavar='REPORT', help='earlier report to compare against')
+    parser.add_argument('--keep', action='store_true', help='keep the generated workspace')
+    args = parser.parse_args()
+
+    workspace = tempfile.mkdtemp(prefix='blog-bench-')
+    try:
+        corpus = generate_corpus(workspace, posts=args.posts, words=args.words,
+                                 code_blocks=args.code_blocks, images=args.images)
+        posts_dir = os.path.join(workspace, 'posts')
+
+        from app import create_app
+        app = create_app(bench_config(workspace))
+        endpoints = _endpoints(posts_dir)
+
+        report = {
+            'meta': {
+                'revision': _git_revision(),
+                'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'cpus': os.cpu_count(),
+            },
+            'corpus': corpus,
+            'parsing': bench_parsing(posts_dir, min(args.posts, args.requests)),
+            'sync': bench_sync(app, posts_dir, args.jobs),
+            'test_client': bench_test_client(app, endpoints, args.requests),
+        }
+        if not args.no_gunicorn:
+            report['gunicorn'] = bench_gunicorn(workspace, endpoints, args.workers, args.concurrency, args.requests)
+    finally:
+        if args.keep:
+            print(f"Workspace kept at {workspace}")
+        else:
+            shutil.rmtree(workspace, ignore_errors=True)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    print(json.dumps(report, indent=2, sort_keys=True))
+    print(f"\nReport written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            compare(json.load(f), report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -15,6 +15,94 @@ POSTS_PER_PAGE = 10
 
 # Database configuration
 DB_FILENAME = "blog.db"
+# Idle connections kept per worker (read-only and read-write pools each)
+DB_POOL_SIZE = 8
+# Prepared statements cached per connection
+DB_STATEMENT_CACHE = 128
+# Seconds to wait on a locked database before failing
+DB_BUSY_TIMEOUT = 5.0
+# WAL lets readers in other workers proceed while sync writes
+SQLITE_JOURNAL_MODE = "wal"
+# Applied to every connection; negative cache_size is in KiB
+SQLITE_PRAGMAS = {
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -16000,
+}
+
+# Upper bound (bytes) for the in-memory rendered post cache, per worker
+RENDER_CACHE_MAX_BYTES = 32 * 1024 * 1024
+
+# Background sync: "auto" (inotify, polling fallback), "inotify", "poll" or "off"
+SYNC_MODE = "auto"
+# Quiet period before a burst of file events triggers a sync
+SYNC_DEBOUNCE_SECONDS = 0.25
+# Worker processes background sync renders changed posts (and highlights code) in
+SYNC_JOBS = 1
+# How often (seconds) a worker checks for a sync generation committed by the leader
+GENERATION_CHECK_SECONDS = 1.0
+
+# Cache-Control per route; ETags let clients revalidate cheaply once stale
+CACHE_CONTROL = {
+    'home': 'public, max-age=60, stale-while-revalidate=600',
+    'load_posts': 'public, max-age=60, stale-while-revalidate=600',
+    'post': 'public, max-age=300, stale-while-revalidate=86400',
+    'search': 'public, max-age=60',
+    'listing': 'public, max-age=60, stale-while-revalidate=600',
+    'icon': 'no-cache',
+}
+# Static files requested with their current content hash (?v=...)
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+# Icons up to this size are kept in memory and served without disk access
+ICON_INLINE_MAX_BYTES = 256 * 1024
+# How often (seconds) the icons folder mtime is re-checked for changes
+ICON_INDEX_CHECK_SECONDS = 5
+
+# Responsive image variants generated from static/images during sync
+IMAGE_VARIANT_WIDTHS = [320, 640, 960, 1280, 1920]
+IMAGE_VARIANT_QUALITY = 80
+
+# Highlighted code blocks are cached in data/highlight.db, shared by all
+# workers and kept across restarts; the oldest are pruned past the limit
+HIGHLIGHT_CACHE = True
+HIGHLIGHT_CACHE_MAX_ENTRIES = 20000
+
+# Markdown rendering
+MARKDOWN_EXTENSIONS = [
+    'markdown.extensions.fenced_code',
+    'markdown.extensions.tables',
+    'markdown.extensions.codehilite',
+    'markdown.extensions.attr_list',
+]
+MARKDOWN_EXTENSION_CONFIGS: dict[str, dict] = {}
+
+# Compression: rendered pages are kept compressed in memory per worker,
+# static text assets on disk under data/compressed (brotli needs the
+# optional "brotli" package, gzip is always available)
+RESPONSE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+COMPRESS_MIN_BYTES = 512
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 9
+
+# Posts whose HTML exceeds STREAM_MIN_BYTES are streamed in chunks
+# (compressed on the fly) instead of being rendered and cached whole
+STREAM_MIN_BYTES = 256 * 1024
+STREAM_CHUNK_BYTES = 32 * 1024
+
+# Opt-in: share whole rendered pages between workers in data/page_cache.db,
+# so a page rendered by one worker is served as stored bytes by all others
+PAGE_CACHE = False
+PAGE_CACHE_ROUTES = ['home', 'post']
+# Query arguments routes read; URLs with any other argument are not stored
+PAGE_CACHE_QUERY_ARGS = ['after', 'limit', 'offset', 'q', 'page']
+# Oldest pages are evicted once the stored bodies exceed this size
+PAGE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# Instrumentation: Prometheus /metrics and Server-Timing headers (per worker)
+METRICS_ENABLED = False
+# Histogram bucket upper bounds in seconds
+METRICS_BUCKETS = [0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5]
 
 # Paths
 POSTS_DIRECTORY = "posts"
@@ -44,4 +132,5 @@ BODY_FONT_SIZE = "1.1rem"
 BODY_LINE_HEIGHT = 1.8
 BODY_LETTER_SPACING = "0.01em"
 HEADING_LETTER_SPACING = "-0.01em"
-CONTENT_MAX_WIDTH = "42rem"  # For optimal reading line length 
\ No newline at end of file
+CONTENT_MAX_WIDTH = "42rem"  # For optimal reading line length
+IMAGE_SIZES = f"(max-width: {CONTENT_MAX_WIDTH}) 100vw, {CONTENT_MAX_WIDTH}" 
\ No newline at end of file
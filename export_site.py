@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Script to export the blog as a static site.
+Renders every page through the Flask app and writes it to an output
+directory; pages whose inputs are unchanged since the last export are skipped.
+
+Usage:
+    python export_site.py [output_directory] [--jobs N] [--force]
+"""
+import os
+import sys
+import json
+import shutil
+import logging
+import argparse
+from itertools import groupby
+from urllib.parse import quote
+from concurrent.futures import ProcessPoolExecutor
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+DEFAULT_OUTPUT_DIR = "dist"
+MANIFEST_FILE = ".export-manifest.json"
+# Posts fetched per infinite scroll request by templates/posts.html
+SCROLL_PAGE_SIZE = 5
+
+_client = None
+
+
+def _create_export_app():
+    """The configured app (instance/config.py included) without background sync, in export mode"""
+    os.environ['SYNC_AUTOSTART'] = '0'
+    from app import create_app
+    flask_app = create_app()
+    flask_app.config['STATIC_EXPORT'] = True
+    return flask_app
+
+
+def _init_worker() -> None:
+    """Create one app and test client per worker process"""
+    global _client
+    _client = _create_export_app().test_client()
+
+
+def _render_page(task: tuple[str, str, str]) -> tuple[str, bool]:
+    """Render a URL to a file, returning (relative path, ok)"""
+    url, rel_path, output_dir = task
+    response = _client.get(url)
+    if response.status_code != 200:
+        logger.error(f"{url} returned {response.status_code}")
+        return rel_path, False
+
+    out_path = os.path.join(output_dir, rel_path)
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    tmp_path = f"{out_path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(response.data)
+    os.replace(tmp_path, out_path)
+    return rel_path, True
+
+
+def _plan_listing(url: str, rel_dir: str, rows: list, per_page: int, key: str) -> dict[str, tuple[str, str]]:
+    """Pages of a tag or month listing: the first at rel_dir, later ones under after/<cursor>/"""
+    from services.post_service import encode_cursor
+
+    pages = {os.path.join(rel_dir, 'index.html'): (url, key)}
+    for last in range(per_page - 1, len(rows) - 1, per_page):
+        cursor = encode_cursor({'date': rows[last][2], 'id': rows[last][0]})
+        pages[os.path.join(rel_dir, 'after', cursor, 'index.html')] = (f'{url}?after={cursor}', key)
+    return pages
+
+
+def _plan_pages(flask_app) -> dict[str, tuple[str, str]]:
+    """Map output path -> (url, input key) for every exported page"""
+    from utils.db import get_db, get_sync_generation
+    from services.post_service import encode_cursor
+    from utils.http_cache import template_assets_version
+
+    per_page = flask_app.config['POSTS_PER_PAGE']
+
+    with flask_app.app_context():
+        # Every page embeds the template assets' ?v= fingerprints
+        build_id = f"{flask_app.config['BUILD_ID']}:{template_assets_version()}"
+        rows = get_db(readonly=True).execute(
+            "SELECT id, file, date, render_hash FROM posts ORDER BY date DESC, id DESC"
+        ).fetchall()
+        tag_rows = get_db(readonly=True).execute(
+            "SELECT t.tag, t.post_id, t.date FROM post_tags t ORDER BY t.tag, t.date DESC, t.post_id DESC"
+        ).fetchall()
+        generation = get_sync_generation()
+
+    listing_key = f"{build_id}:{generation}"
+    pages = {'index.html': ('/', listing_key)}
+    for _, file, _, render_hash in rows:
+        slug = os.path.splitext(file)[0]
+        pages[os.path.join('post', slug, 'index.html')] = (f'/post/{slug}', f"{build_id}:{render_hash}")
+    # Infinite scroll shards, named by the cursor that requests them: the home
+    # page's cursor, then each shard's next_cursor, down to the empty last one
+    for last in range(min(per_page, len(rows)) - 1, len(rows), SCROLL_PAGE_SIZE):
+        cursor = encode_cursor({'date': rows[last][2], 'id': rows[last][0]})
+        pages[os.path.join('load_posts', f'{cursor}.json')] = (
+            f'/load_posts?after={cursor}&limit={SCROLL_PAGE_SIZE}', listing_key
+        )
+
+    pages[os.path.join('archive', 'index.html')] = ('/archive', listing_key)
+    dated = sorted((r for r in rows if r[2]), key=lambda r: r[2][:7])
+    for month, group in groupby(dated, key=lambda r: r[2][:7]):
+        year, mm = month.split('-')
+        in_month = sorted(group, key=lambda r: (r[2], r[0]), reverse=True)
+        pages.update(_plan_listing(f'/archive/{year}/{mm}', os.path.join('archive', year, mm),
+                                   in_month, per_page, listing_key))
+    for tag, group in groupby(tag_rows, key=lambda r: r[0]):
+        pages.update(_plan_listing(f'/tag/{quote(tag)}', os.path.join('tag', tag),
+                                   [(r[1], None, r[2]) for r in group], per_page, listing_key))
+    return pages
+
+
+def _copy_static(static_dir: str, output_dir: str) -> int:
+    """Copy static assets whose size or mtime changed, returning the count"""
+    copied = 0
+    for root, _, files in os.walk(static_dir):
+        for name in files:
+            src = os.path.join(root, name)
+            dst = os.path.join(output_dir, 'static', os.path.relpath(src, static_dir))
+            src_st = os.stat(src)
+            try:
+                dst_st = os.stat(dst)
+                if dst_st.st_size == src_st.st_size and dst_st.st_mtime_ns == src_st.st_mtime_ns:
+                    continue
+            except FileNotFoundError:
+                pass
+            os.makedirs(os.path.dirname(dst), exist_ok=True)
+            shutil.copy2(src, dst)
+            copied += 1
+    return copied
+
+
+def _load_manifest(output_dir: str) -> dict[str, str]:
+    """Input keys recorded by the previous export"""
+    try:
+        with open(os.path.join(output_dir, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _save_manifest(output_dir: str, manifest: dict[str, str]) -> None:
+    """Atomically write the input keys of this export"""
+    path = os.path.join(output_dir, MANIFEST_FILE)
+    with open(f"{path}.tmp", 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(f"{path}.tmp", path)
+
+
+def export_site(output_dir: str, jobs: int | None = None, force: bool = False) -> bool:
+    """Sync posts, then render all pages that changed since the last export"""
+    from services.sync_service import sync_posts_to_db
+
+    flask_app = _create_export_app()
+    with flask_app.app_context():
+        if not sync_posts_to_db():
+            logger.error("Post sync failed")
+            return False
+
+    os.makedirs(output_dir, exist_ok=True)
+    pages = _plan_pages(flask_app)
+    previous = {} if force else _load_manifest(output_dir)
+
+    stale = [
+        (url, rel_path, output_dir) for rel_path, (url, key) in pages.items()
+        if previous.get(rel_path) != key or not os.path.exists(os.path.join(output_dir, rel_path))
+    ]
+    # The icon is picked at random per request; export one pick each run
+    stale.append(('/icon', 'icon', output_dir))
+
+    manifest = {p: key for p, (_, key) in pages.items() if previous.get(p) == key}
+    failed = []
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker) as pool:
+        for rel_path, ok in pool.map(_render_page, stale, chunksize=16):
+            if not ok:
+                failed.append(rel_path)
+            elif rel_path in pages:
+                manifest[rel_path] = pages[rel_path][1]
+
+    for rel_path in set(previous) - set(pages):
+        try:
+            os.remove(os.path.join(output_dir, rel_path))
+        except FileNotFoundError:
+            pass
+
+    _save_manifest(output_dir, manifest)
+    copied = _copy_static(flask_app.config['STATIC_DIR'], output_dir)
+
+    logger.info(
+        f"Exported {len(stale) - len(failed)} pages ({len(pages) + 1 - len(stale)} unchanged), "
+        f"copied {copied} static files to {output_dir}"
+    )
+    if failed:
+        logger.error(f"Failed: {', '.join(failed)}")
+    return not failed
+
+
+def main():
+    """Export the static site"""
+    parser = argparse.ArgumentParser(description="Export the blog as a static site")
+    parser.add_argument('output_dir', nargs='?', default=DEFAULT_OUTPUT_DIR)
+    parser.add_argument('--jobs', '-j', type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument('--force', action='store_true', help="re-render every page")
+    args = parser.parse_args()
+
+    return 0 if export_site(args.output_dir, jobs=args.jobs, force=args.force) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,31 @@
+"""
+Gunicorn settings for CoreBlog
+
+    gunicorn -c gunicorn.conf.py
+
+The app is created once in the master (--preload) and forked into the
+workers, so a worker boots without re-importing or re-initialising
+anything. Background sync is started after fork; the sync file lock
+lets exactly one worker run it.
+"""
+import os
+
+# Must be set before the app is loaded by the master
+os.environ.setdefault('SYNC_AUTOSTART', '0')
+
+wsgi_app = 'run_production:application'
+bind = os.environ.get('BIND', '0.0.0.0:5001')
+workers = int(os.environ.get('WEB_CONCURRENCY', 4))
+preload_app = True
+
+
+def post_worker_init(worker) -> None:
+    """Start background sync in this worker (a no-op unless it wins the lock)"""
+    from utils.scheduler import start_background_sync
+    start_background_sync(worker.wsgi)
+
+
+def pre_fork(server, worker) -> None:
+    """Close the master's pooled SQLite connections so no worker inherits them"""
+    from utils.db import close_pools
+    close_pools()
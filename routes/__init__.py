@@ -1,28 +1,53 @@
 """Blog routes using Flask Blueprints"""
 import os
 from flask import (
-    Blueprint, Flask, Response, jsonify, render_template, 
+    Blueprint, Flask, Response, jsonify, render_template, stream_template,
     request, abort, redirect, url_for, current_app, send_from_directory
 )
-from services.post_service import get_posts, get_post_by_slug
-from services.icon_service import get_random_icon
+from services.post_service import (
+    get_posts, get_post_by_slug, get_post_version, encode_cursor, decode_cursor,
+    get_posts_by_tag, get_posts_by_month, get_archive_months
+)
+from services.icon_service import get_random_icon_entry
+from services.search_service import search_posts
+from services.sync_service import drift_stats, get_sync_status, observe_sync_generation
+from utils.db import get_sync_generation
+from utils.render_cache import render_cache
+from utils.page_cache import page_cache_stats
+from utils.highlight import highlight_cache_stats
+from utils.http_cache import conditional, make_etag, apply_cache_control
+from utils.compression import stream_response
+from utils.markdown_parser import normalize_tag
 
 posts_bp = Blueprint('posts', __name__)
+ops_bp = Blueprint('ops', __name__, url_prefix='/_ops')
 
 
 @posts_bp.route('/')
-def home() -> str:
+def home() -> Response:
     """Render homepage with posts list"""
-    return render_template('posts.html', posts=get_posts(limit=current_app.config['POSTS_PER_PAGE']))
+    def render() -> str:
+        posts = get_posts(limit=current_app.config['POSTS_PER_PAGE'])
+        next_cursor = encode_cursor(posts[-1]) if posts else None
+        return render_template('posts.html', posts=posts, next_cursor=next_cursor)
+    return conditional('home', make_etag('home', get_sync_generation()), render)
 
 
 @posts_bp.route('/post/<slug>')
-def single_post(slug: str) -> str:
-    """Render a single post by slug"""
-    post = get_post_by_slug(slug)
-    if not post:
-        abort(404)
-    return render_template('post.html', post=post)
+def single_post(slug: str) -> Response:
+    """Render a single post by slug; very long posts are streamed in chunks"""
+    def render() -> str | Response:
+        post = get_post_by_slug(slug)
+        if not post:
+            abort(404)
+        size = current_app.config['STREAM_CHUNK_BYTES']
+        if len(post['content']) < current_app.config['STREAM_MIN_BYTES']:
+            return render_template('post.html', post=post)
+        content = post['content']
+        post['chunks'] = (content[i:i + size] for i in range(0, len(content), size))
+        return stream_response(stream_template('post.html', post=post))
+    version = get_post_version(slug)
+    return conditional('post', make_etag('post', slug, version) if version else None, render)
 
 
 @posts_bp.route('/about')
@@ -31,24 +56,161 @@ def about() -> Response:
     return redirect(url_for('posts.single_post', slug='about'))
 
 
+def _cursor_arg() -> tuple[str | None, int] | None:
+    """Decoded ?after= cursor; a malformed one is a 400"""
+    cursor = request.args.get('after')
+    if not cursor:
+        return None
+    after = decode_cursor(cursor)
+    if after is None:
+        abort(400)
+    return after
+
+
 @posts_bp.route('/load_posts')
 def load_posts() -> Response:
-    """API endpoint for infinite scroll pagination"""
-    offset = request.args.get('offset', 0, type=int)
+    """API endpoint for infinite scroll pagination.
+
+    Prefer ?after=<cursor> (next_cursor from the previous page); ?offset= is
+    kept for older clients but gets slower the deeper it goes.
+    """
     limit = request.args.get('limit', current_app.config['POSTS_PER_PAGE'], type=int)
-    return jsonify({'posts': get_posts(limit=limit, offset=offset)})
+    after = _cursor_arg()
+
+    def render() -> Response:
+        if after:
+            posts = get_posts(limit=limit, after=after)
+        else:
+            posts = get_posts(limit=limit, offset=request.args.get('offset', 0, type=int))
+        next_cursor = encode_cursor(posts[-1]) if posts else None
+        return jsonify({'posts': posts, 'next_cursor': next_cursor})
+    return conditional('load_posts', make_etag('load_posts', get_sync_generation()), render)
+
+
+def _listing_page(heading: str, posts: list[dict]) -> str:
+    """One page of a tag or archive listing, fetched with one extra row to tell if a next page exists"""
+    if not posts and not request.args.get('after'):
+        abort(404)
+    per_page = current_app.config['POSTS_PER_PAGE']
+    page = posts[:per_page]
+    next_url = None
+    if len(posts) > per_page:
+        cursor = encode_cursor(page[-1])
+        # A static export has no query strings: export_site.py writes later pages under after/<cursor>/
+        next_url = f"{request.path}/after/{cursor}/" if current_app.config['STATIC_EXPORT'] else f"?after={cursor}"
+    return render_template('listing.html', heading=heading, posts=page, next_url=next_url)
+
+
+@posts_bp.route('/tag/<name>')
+def tag(name: str) -> Response:
+    """Posts with a tag, paginated by ?after= cursor"""
+    tag_name, after = normalize_tag(name), _cursor_arg()
+
+    def render() -> str:
+        posts = get_posts_by_tag(tag_name, limit=current_app.config['POSTS_PER_PAGE'] + 1, after=after)
+        return _listing_page(f"#{tag_name}", posts)
+    return conditional('listing', make_etag('tag', get_sync_generation()), render)
+
+
+@posts_bp.route('/archive')
+def archive() -> Response:
+    """Months with posts, linking to their archive pages"""
+    def render() -> str:
+        return render_template('listing.html', heading='Archive', months=get_archive_months(), posts=[])
+    return conditional('listing', make_etag('archive', get_sync_generation()), render)
+
+
+@posts_bp.route('/archive/<int(fixed_digits=4):year>/<int(fixed_digits=2):month>')
+def archive_month(year: int, month: int) -> Response:
+    """Posts dated in one month, paginated by ?after= cursor"""
+    if not 1 <= month <= 12:
+        abort(404)
+    after = _cursor_arg()
+
+    def render() -> str:
+        posts = get_posts_by_month(year, month, limit=current_app.config['POSTS_PER_PAGE'] + 1, after=after)
+        return _listing_page(f"{year:04d}-{month:02d}", posts)
+    return conditional('listing', make_etag('archive_month', get_sync_generation()), render)
+
+
+@posts_bp.route('/search')
+def search() -> Response:
+    """Search results page"""
+    query = request.args.get('q', '').strip()
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = current_app.config['POSTS_PER_PAGE']
+
+    def render() -> str:
+        results = search_posts(query, limit=per_page + 1, offset=(page - 1) * per_page) if query else []
+        return render_template(
+            'search.html', query=query, results=results[:per_page],
+            page=page, has_more=len(results) > per_page
+        )
+    return conditional('search', make_etag('search', get_sync_generation()), render)
+
+
+@posts_bp.route('/search_posts')
+def search_posts_api() -> Response:
+    """API endpoint for search: ranked results with highlighted snippets"""
+    query = request.args.get('q', '').strip()
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    limit = min(max(request.args.get('limit', current_app.config['POSTS_PER_PAGE'], type=int), 1), 100)
+
+    def render() -> Response:
+        results = search_posts(query, limit=limit + 1, offset=offset) if query else []
+        return jsonify({'posts': results[:limit], 'has_more': len(results) > limit})
+    return conditional('search', make_etag('search_posts', get_sync_generation()), render)
 
 
 @posts_bp.route('/icon')
 def random_icon() -> Response:
-    """Serve a random icon from the icons folder"""
-    icon = get_random_icon()
+    """Serve a random icon, from memory when it was small enough to pre-read"""
+    icon = get_random_icon_entry()
     if not icon:
         abort(404)
-    icons_dir = os.path.join(current_app.config['STATIC_DIR'], 'icons')
-    return send_from_directory(icons_dir, icon)
+    if icon['data'] is None:
+        icons_dir = os.path.join(current_app.config['STATIC_DIR'], 'icons')
+        return apply_cache_control(send_from_directory(icons_dir, icon['name']), 'icon')
+    response = Response(icon['data'], mimetype=icon['mimetype'])
+    response.set_etag(icon['etag'])
+    return apply_cache_control(response.make_conditional(request), 'icon')
+
+
+@ops_bp.route('/cache')
+def cache_stats() -> Response:
+    """Render and highlight cache counters for this worker, and shared cache sizes"""
+    return jsonify({
+        'render_cache': render_cache.stats(),
+        'page_cache': page_cache_stats(),
+        'highlight_cache': highlight_cache_stats(),
+    })
+
+
+@ops_bp.route('/startup')
+def startup() -> Response:
+    """Boot phase timings (ms) of this worker's app"""
+    return jsonify({'pid': os.getpid(), 'timings_ms': current_app.extensions.get('startup_timings', {})})
+
+
+@ops_bp.route('/sync')
+def sync_status() -> Response:
+    """Last sync time and duration, sync generation and leader process"""
+    return jsonify(get_sync_status())
+
+
+@ops_bp.route('/drift')
+def drift() -> Response:
+    """Title drift found on the read path and reconciled by sync"""
+    return jsonify(drift_stats())
+
+
+@posts_bp.before_app_request
+def check_sync_generation() -> None:
+    """Notice syncs committed by the leader process"""
+    observe_sync_generation()
 
 
 def register_blueprints(app: Flask) -> None:
     """Register all blueprints with the app"""
     app.register_blueprint(posts_bp)
+    app.register_blueprint(ops_bp)
@@ -1,5 +1,6 @@
 """
 Services module for blog business logic
 """
-from services.post_service import get_posts, get_post_by_slug, get_post_count
+from services.post_service import get_posts, get_post_by_slug, get_post_count, get_post_version
 from services.sync_service import sync_posts_to_db
+from utils.db import get_sync_generation
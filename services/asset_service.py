@@ -0,0 +1,100 @@
+"""Asset service - manifest of static files for fingerprinted URLs and validation"""
+import os
+import json
+import hashlib
+import logging
+import threading
+from flask import current_app, url_for
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_loaded: dict = {'path': None, 'mtime_ns': None, 'assets': {}}
+
+
+def _load_file(manifest_path: str) -> dict:
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def refresh_asset_manifest(static_dir: str, manifest_path: str) -> set[str]:
+    """Rebuild the manifest of static files, hashing only new or changed ones.
+
+    Returns the paths that were added, changed or removed.
+    """
+    previous = _load_file(manifest_path)
+    assets = {}
+    for root, _, files in os.walk(static_dir):
+        for name in files:
+            path = os.path.join(root, name)
+            rel = os.path.relpath(path, static_dir).replace(os.sep, '/')
+            if name.startswith('.') or name.endswith('.tmp'):
+                continue
+            st = os.stat(path)
+            old = previous.get(rel)
+            if old and old['size'] == st.st_size and old['mtime_ns'] == st.st_mtime_ns:
+                assets[rel] = old
+                continue
+            digest = hashlib.sha256()
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                    digest.update(chunk)
+            assets[rel] = {'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'hash': digest.hexdigest()[:12]}
+
+    changed = {
+        rel for rel in assets.keys() | previous.keys()
+        if (assets.get(rel) or {}).get('hash') != (previous.get(rel) or {}).get('hash')
+    }
+    if assets == previous:
+        return changed
+
+    os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+    with open(f"{manifest_path}.tmp", 'w', encoding='utf-8') as f:
+        json.dump(assets, f, indent=1, sort_keys=True)
+    os.replace(f"{manifest_path}.tmp", manifest_path)
+    logger.info(f"Asset manifest: {len(assets)} files, {len(changed)} changed")
+    return changed
+
+
+def load_asset_manifest(manifest_path: str) -> dict:
+    """Manifest as {relative path: {size, mtime_ns, hash}}, re-read only when the file changes"""
+    try:
+        mtime_ns = os.stat(manifest_path).st_mtime_ns
+    except FileNotFoundError:
+        return {}
+
+    with _lock:
+        if _loaded['path'] != manifest_path or _loaded['mtime_ns'] != mtime_ns:
+            _loaded.update(path=manifest_path, mtime_ns=mtime_ns, assets=_load_file(manifest_path))
+        return _loaded['assets']
+
+
+def get_asset(filename: str) -> dict | None:
+    """Manifest entry of a static file"""
+    return load_asset_manifest(current_app.config['ASSET_MANIFEST']).get(filename)
+
+
+def asset_matches_disk(static_dir: str, filename: str, asset: dict) -> bool:
+    """True if the file still has the size and mtime its manifest entry was hashed at"""
+    try:
+        st = os.stat(os.path.join(static_dir, filename))
+    except OSError:
+        return False
+    return (st.st_size, st.st_mtime_ns) == (asset['size'], asset['mtime_ns'])
+
+
+def get_asset_hash(filename: str) -> str | None:
+    """Content hash of a static file according to the manifest"""
+    entry = get_asset(filename)
+    return entry['hash'] if entry else None
+
+
+def asset_url(filename: str) -> str:
+    """URL of a static file, fingerprinted with its content hash when known"""
+    digest = get_asset_hash(filename)
+    if digest:
+        return url_for('static_files', filename=filename, v=digest)
+    return url_for('static_files', filename=filename)
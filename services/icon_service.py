@@ -1,25 +1,75 @@
-"""Icon service - handles random icon selection"""
+"""Icon service - handles random icon selection from an in-memory index"""
 import os
+import time
 import random
+import hashlib
+import mimetypes
+import logging
+import threading
 from flask import current_app
 
+logger = logging.getLogger(__name__)
+
 SUPPORTED_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.gif', '.webp'}
 
+_lock = threading.Lock()
+_index: dict = {'dir': None, 'mtime_ns': None, 'checked': 0.0, 'icons': []}
 
-def get_random_icon() -> str | None:
-    """Get a random icon filename from the icons folder"""
+
+def _build_index(icons_dir: str, inline_max_bytes: int) -> list[dict]:
+    """Scan the icons folder once, pre-reading small icons"""
+    icons = []
+    with os.scandir(icons_dir) as it:
+        for entry in it:
+            if not entry.is_file() or os.path.splitext(entry.name)[1].lower() not in SUPPORTED_EXTENSIONS:
+                continue
+            st = entry.stat()
+            data = None
+            if st.st_size <= inline_max_bytes:
+                with open(entry.path, 'rb') as f:
+                    data = f.read()
+            etag_source = data if data is not None else f"{st.st_size}:{st.st_mtime_ns}".encode('utf-8')
+            icons.append({
+                'name': entry.name,
+                'mimetype': mimetypes.guess_type(entry.name)[0] or 'application/octet-stream',
+                'etag': hashlib.sha256(etag_source).hexdigest()[:32],
+                'data': data,
+            })
+    return icons
+
+
+def refresh_icon_index(icons_dir: str, inline_max_bytes: int, force: bool = False) -> list[dict]:
+    """Rebuild the index if the folder's mtime changed since the last scan"""
+    try:
+        mtime_ns = os.stat(icons_dir).st_mtime_ns
+    except FileNotFoundError:
+        mtime_ns = None
+
+    with _lock:
+        _index['checked'] = time.monotonic()
+        if not force and _index['dir'] == icons_dir and _index['mtime_ns'] == mtime_ns:
+            return _index['icons']
+        icons = _build_index(icons_dir, inline_max_bytes) if mtime_ns is not None else []
+        _index.update(dir=icons_dir, mtime_ns=mtime_ns, icons=icons)
+        logger.debug(f"Indexed {len(icons)} icons in {icons_dir}")
+        return icons
+
+
+def get_random_icon_entry() -> dict | None:
+    """Random icon from the index; the folder is re-checked at most every ICON_INDEX_CHECK_SECONDS"""
     icons_dir = os.path.join(current_app.config['STATIC_DIR'], 'icons')
-    
-    if not os.path.exists(icons_dir):
-        return None
-    
-    icons = [
-        f for f in os.listdir(icons_dir)
-        if os.path.isfile(os.path.join(icons_dir, f))
-        and os.path.splitext(f)[1].lower() in SUPPORTED_EXTENSIONS
-    ]
-    
+    icons = _index['icons']
+    stale = time.monotonic() - _index['checked'] > current_app.config['ICON_INDEX_CHECK_SECONDS']
+    if _index['dir'] != icons_dir or stale:
+        icons = refresh_icon_index(icons_dir, current_app.config['ICON_INLINE_MAX_BYTES'])
+
     if not icons:
         return None
-    
+
     return random.choice(icons)
+
+
+def get_random_icon() -> str | None:
+    """Get a random icon filename from the icons folder"""
+    icon = get_random_icon_entry()
+    return icon['name'] if icon else None
@@ -0,0 +1,159 @@
+"""Image service - generates responsive WebP/JPEG variants of post images"""
+import os
+import json
+import hashlib
+import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+SOURCE_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.webp'}
+VARIANTS_DIR = '_variants'
+MANIFEST_NAME = 'manifest.json'
+
+_lock = threading.Lock()
+_loaded: dict = {'path': None, 'mtime_ns': None, 'index': {}}
+
+
+def _manifest_path(images_dir: str) -> str:
+    return os.path.join(images_dir, VARIANTS_DIR, MANIFEST_NAME)
+
+
+def _scan_sources(images_dir: str) -> dict[str, tuple[int, int]]:
+    """Source images under static/images as {relative path: (size, mtime_ns)}"""
+    sources = {}
+    for root, dirs, files in os.walk(images_dir):
+        dirs[:] = [d for d in dirs if d != VARIANTS_DIR]
+        for name in files:
+            if os.path.splitext(name)[1].lower() in SOURCE_EXTENSIONS:
+                path = os.path.join(root, name)
+                st = os.stat(path)
+                sources[os.path.relpath(path, images_dir).replace(os.sep, '/')] = (st.st_size, st.st_mtime_ns)
+    return sources
+
+
+def _generate_variants(task: tuple[str, str, list[int], int]) -> tuple[str, dict | None]:
+    """Resize one source image to every configured width (runs in a worker)"""
+    from PIL import Image, ImageOps
+
+    images_dir, rel_path, widths, quality = task
+    try:
+        src_path = os.path.join(images_dir, rel_path)
+        with open(src_path, 'rb') as f:
+            digest = hashlib.sha256(f.read()).hexdigest()[:10]
+
+        stem = os.path.splitext(rel_path)[0]
+        out_dir = os.path.join(images_dir, VARIANTS_DIR, os.path.dirname(rel_path))
+        os.makedirs(out_dir, exist_ok=True)
+
+        with Image.open(src_path) as original:
+            image = ImageOps.exif_transpose(original)
+            width, height = image.size
+            has_alpha = image.mode in ('RGBA', 'LA', 'PA') or 'transparency' in image.info
+            variants: dict[str, list[list]] = {'webp': [], 'jpeg': []}
+
+            for target in sorted({w for w in widths if w < width} | {width}):
+                resized = image if target == width else image.resize(
+                    (target, max(1, round(height * target / width))), Image.LANCZOS
+                )
+                formats = ['webp'] if has_alpha else ['webp', 'jpeg']
+                for fmt in formats:
+                    rel_out = f"{VARIANTS_DIR}/{stem}.{digest}-{target}.{'jpg' if fmt == 'jpeg' else fmt}"
+                    out_path = os.path.join(images_dir, rel_out)
+                    if not os.path.exists(out_path):
+                        frame = resized if fmt == 'webp' or resized.mode == 'RGB' else resized.convert('RGB')
+                        frame.save(f"{out_path}.tmp", format=fmt.upper(), quality=quality)
+                        os.replace(f"{out_path}.tmp", out_path)
+                    variants[fmt].append([target, rel_out])
+
+        return rel_path, {'width': width, 'height': height, 'variants': variants}
+    except Exception as e:
+        logger.error(f"Error generating variants for {rel_path}: {e}")
+        return rel_path, None
+
+
+def _remove_variants(images_dir: str, entry: dict, keep: set[str]) -> None:
+    """Delete variant files of an old manifest entry that are no longer used"""
+    for files in entry.get('variants', {}).values():
+        for _, rel_out in files:
+            if rel_out not in keep:
+                try:
+                    os.remove(os.path.join(images_dir, rel_out))
+                except FileNotFoundError:
+                    pass
+
+
+def update_image_variants(static_dir: str, widths: list[int], quality: int = 80, jobs: int = 1) -> set[str]:
+    """Regenerate variants for new or changed images; return the paths whose variants changed.
+
+    Sources Pillow cannot read are recorded as failed under their size and
+    mtime, so they are retried only once the file changes.
+    """
+    images_dir = os.path.join(static_dir, 'images')
+    if not os.path.isdir(images_dir):
+        return set()
+
+    manifest_path = _manifest_path(images_dir)
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, ValueError):
+        manifest = {}
+
+    sources = _scan_sources(images_dir)
+    stale = [
+        rel for rel, stat in sources.items()
+        if manifest.get(rel, {}).get('source') != list(stat) or manifest[rel].get('widths') != widths
+    ]
+    removed = set(manifest) - set(sources)
+    if not stale and not removed:
+        return set()
+
+    tasks = [(images_dir, rel, widths, quality) for rel in stale]
+    if jobs > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            results = list(pool.map(_generate_variants, tasks))
+    else:
+        results = [_generate_variants(task) for task in tasks]
+
+    changed = set(removed)
+    for rel, entry in results:
+        old = manifest.pop(rel, None)
+        manifest[rel] = {**(entry or {'failed': True}), 'source': list(sources[rel]), 'widths': widths}
+        if entry or (old and not old.get('failed')):
+            changed.add(rel)
+        if old:
+            keep = {rel_out for files in (entry or {}).get('variants', {}).values() for _, rel_out in files}
+            _remove_variants(images_dir, old, keep)
+    for rel in removed:
+        _remove_variants(images_dir, manifest.pop(rel), set())
+
+    os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+    with open(f"{manifest_path}.tmp", 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(f"{manifest_path}.tmp", manifest_path)
+
+    failed = sum(1 for _, entry in results if entry is None)
+    logger.info(f"Image variants: {len(stale) - failed} regenerated, {failed} failed, {len(removed)} removed")
+    return changed
+
+
+def load_image_index(static_dir: str) -> dict:
+    """Variant manifest for the renderer, re-read only when the file changes"""
+    manifest_path = _manifest_path(os.path.join(static_dir, 'images'))
+    try:
+        mtime_ns = os.stat(manifest_path).st_mtime_ns
+    except FileNotFoundError:
+        return {}
+
+    with _lock:
+        if _loaded['path'] != manifest_path or _loaded['mtime_ns'] != mtime_ns:
+            try:
+                with open(manifest_path, 'r', encoding='utf-8') as f:
+                    index = json.load(f)
+            except ValueError as e:
+                logger.error(f"Invalid image manifest {manifest_path}: {e}")
+                index = {}
+            _loaded.update(path=manifest_path, mtime_ns=mtime_ns, index=index)
+        return _loaded['index']
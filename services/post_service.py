@@ -1,65 +1,206 @@
 """Post service - handles post operations"""
 import os
+import json
+import base64
 import logging
 from flask import current_app
 from utils.db import get_db
 from utils.markdown_parser import read_markdown_file, render_markdown, extract_metadata
+from utils.render_cache import render_cache
+from services.image_service import load_image_index
+from services.asset_service import load_asset_manifest
+from services.sync_service import queue_drift
 
 logger = logging.getLogger(__name__)
 
 
-def get_posts(limit: int = 10, offset: int = 0) -> list[dict]:
-    """Get posts with pagination"""
+def get_posts(limit: int = 10, offset: int = 0, after: tuple[str | None, int] | None = None) -> list[dict]:
+    """Get posts newest first, paginated by keyset cursor (after) or offset"""
     try:
-        db = get_db()
-        rows = db.execute(
-            "SELECT id, file, title, date FROM posts ORDER BY date DESC LIMIT ? OFFSET ?",
-            [limit, offset]
-        ).fetchall()
+        db = get_db(readonly=True)
+        if after is None:
+            rows = db.execute(
+                "SELECT id, file, title, date FROM posts ORDER BY date DESC, id DESC LIMIT ? OFFSET ?",
+                [limit, offset]
+            ).fetchall()
+        else:
+            rows = _keyset_page(db, "SELECT id, file, title, date FROM posts WHERE 1", 'date', 'id', [], limit, after)
         return [{'id': r[0], 'file': r[1], 'title': r[2], 'date': r[3]} for r in rows]
     except Exception as e:
         logger.error(f"Error retrieving posts: {e}")
         return []
 
 
+def _keyset_page(db, query: str, date_col: str, id_col: str, params: list, limit: int,
+                 after: tuple[str | None, int] | None) -> list:
+    """Rows of query (ending in a WHERE clause) newest first, starting past the cursor"""
+    order = f"ORDER BY {date_col} DESC, {id_col} DESC LIMIT ?"
+    if after is None:
+        return db.execute(f"{query} {order}", [*params, limit]).fetchall()
+    rows = []
+    if after[0] is not None:
+        rows = db.execute(
+            f"{query} AND ({date_col}, {id_col}) < (?, ?) {order}", [*params, after[0], after[1], limit]
+        ).fetchall()
+    if len(rows) < limit:
+        # Undated posts sort last; continue into them once dated ones run out
+        below_id = after[1] if after[0] is None else 2 ** 63 - 1
+        rows += db.execute(
+            f"{query} AND {date_col} IS NULL AND {id_col} < ? ORDER BY {id_col} DESC LIMIT ?",
+            [*params, below_id, limit - len(rows)]
+        ).fetchall()
+    return rows
+
+
+def _listing(rows: list) -> list[dict]:
+    return [{'id': r[0], 'file': r[1], 'title': r[2], 'date': r[3], 'summary': r[4]} for r in rows]
+
+
+def get_posts_by_tag(tag: str, limit: int = 10, after: tuple[str | None, int] | None = None) -> list[dict]:
+    """Posts with a tag newest first, read through the (tag, date, post_id) index"""
+    try:
+        rows = _keyset_page(
+            get_db(readonly=True),
+            "SELECT p.id, p.file, p.title, p.date, p.summary FROM post_tags t "
+            "JOIN posts p ON p.id = t.post_id WHERE t.tag = ?",
+            't.date', 't.post_id', [tag], limit, after
+        )
+        return _listing(rows)
+    except Exception as e:
+        logger.error(f"Error retrieving posts tagged {tag}: {e}")
+        return []
+
+
+def get_posts_by_month(year: int, month: int, limit: int = 10,
+                       after: tuple[str | None, int] | None = None) -> list[dict]:
+    """Posts dated in one month newest first, as a range scan of the (date, id) index"""
+    start = f"{year:04d}-{month:02d}"
+    end = f"{year + 1:04d}-01" if month == 12 else f"{year:04d}-{month + 1:02d}"
+    try:
+        rows = _keyset_page(
+            get_db(readonly=True),
+            "SELECT id, file, title, date, summary FROM posts WHERE date >= ? AND date < ?",
+            'date', 'id', [start, end], limit, after
+        )
+        return _listing(rows)
+    except Exception as e:
+        logger.error(f"Error retrieving posts of {start}: {e}")
+        return []
+
+
+def get_archive_months() -> list[dict]:
+    """Months with posts, newest first, from the table sync maintains"""
+    try:
+        rows = get_db(readonly=True).execute(
+            "SELECT month, post_count FROM archive_months ORDER BY month DESC"
+        ).fetchall()
+        return [{'month': r[0], 'post_count': r[1]} for r in rows]
+    except Exception as e:
+        logger.error(f"Error retrieving archive months: {e}")
+        return []
+
+
+def get_post_tags(post_id: int) -> list[str]:
+    try:
+        rows = get_db(readonly=True).execute(
+            "SELECT tag FROM post_tags WHERE post_id = ? ORDER BY tag", [post_id]
+        ).fetchall()
+        return [r[0] for r in rows]
+    except Exception as e:
+        logger.error(f"Error retrieving tags of post {post_id}: {e}")
+        return []
+
+
+def encode_cursor(post: dict) -> str:
+    """Opaque cursor pointing just past the given post"""
+    raw = json.dumps([post['date'], post['id']], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> tuple[str | None, int] | None:
+    """Decode a cursor from encode_cursor, or None if it is malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        date, post_id = json.loads(raw)
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(post_id, int) or not (date is None or isinstance(date, str)):
+        return None
+    return date, post_id
+
+
 def get_post_by_slug(slug: str) -> dict | None:
     """Get a single post by slug (filename without .md)"""
     try:
         filename = f"{slug}.md"
-        db = get_db()
-        row = db.execute(
-            "SELECT id, file, title, date FROM posts WHERE file = ?", [filename]
+        row = get_db(readonly=True).execute(
+            "SELECT id, file, title, date, html, word_count FROM posts WHERE file = ?", [filename]
         ).fetchone()
         
         if not row:
             return None
         
-        posts_dir = current_app.config['POSTS_DIR']
-        raw_content = read_markdown_file(os.path.join(posts_dir, filename))
+        if row[4] is not None:
+            return {
+                'id': row[0], 'file': row[1], 'title': row[2], 'date': row[3],
+                'content': row[4], 'word_count': row[5], 'tags': get_post_tags(row[0])
+            }
         
-        if not raw_content:
-            logger.error(f"Post content not found: {filename}")
-            return None
+        # Not pre-rendered by sync yet: render from disk through the local cache
+        filepath = os.path.join(current_app.config['POSTS_DIR'], filename)
+        version = render_cache.file_version(filepath)
+        rendered = render_cache.get(filepath, version)
+        
+        if rendered is None:
+            raw_content = read_markdown_file(filepath)
+            
+            if not raw_content:
+                logger.error(f"Post content not found: {filename}")
+                return None
+            
+            metadata = extract_metadata(raw_content, filepath)
+            rendered = {
+                'title': metadata['title'],
+                'content': render_markdown(
+                    raw_content,
+                    image_index=load_image_index(current_app.config['STATIC_DIR']),
+                    assets=load_asset_manifest(current_app.config['ASSET_MANIFEST'])
+                ),
+                'word_count': len(raw_content.split())
+            }
+            render_cache.put(filepath, version, rendered)
         
-        metadata = extract_metadata(raw_content, os.path.join(posts_dir, filename))
-        title = metadata['title'] or row[2]
+        title = rendered['title'] or row[2]
         
-        if metadata['title'] and metadata['title'] != row[2]:
-            db.execute("UPDATE posts SET title = ? WHERE id = ?", [metadata['title'], row[0]])
-            db.commit()
+        if rendered['title'] and rendered['title'] != row[2]:
+            # Never write on the read path: let the syncing process fix the row
+            queue_drift(filename, rendered['title'])
         
         return {
             'id': row[0], 'file': row[1], 'title': title,
-            'date': row[3], 'content': render_markdown(raw_content)
+            'date': row[3], 'content': rendered['content'], 'word_count': rendered['word_count'],
+            'tags': get_post_tags(row[0])
         }
     except Exception as e:
         logger.error(f"Error retrieving post {slug}: {e}")
         return None
 
 
+def get_post_version(slug: str) -> str | None:
+    """Hash of a pre-rendered post as sync rendered it, or None if it must be rendered"""
+    try:
+        row = get_db(readonly=True).execute(
+            "SELECT render_hash FROM posts WHERE file = ? AND html IS NOT NULL", [f"{slug}.md"]
+        ).fetchone()
+        return row[0] if row else None
+    except Exception as e:
+        logger.error(f"Error retrieving version of post {slug}: {e}")
+        return None
+
+
 def get_post_count() -> int:
     """Get total number of posts"""
     try:
-        return get_db().execute("SELECT COUNT(*) FROM posts").fetchone()[0]
+        return get_db(readonly=True).execute("SELECT COUNT(*) FROM posts").fetchone()[0]
     except Exception:
         return 0
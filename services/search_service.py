@@ -0,0 +1,50 @@
+"""Search service - full-text search over posts via SQLite FTS5"""
+import re
+import logging
+from markupsafe import escape
+from utils.db import get_db
+
+logger = logging.getLogger(__name__)
+
+# Control characters never present in indexed text, swapped for <mark> after escaping
+_MARK_START, _MARK_END = '\x02', '\x03'
+
+
+def build_match_query(query: str) -> str | None:
+    """Turn free text into an FTS5 query: every word must match, the last as a prefix"""
+    words = re.findall(r'\w+', query)
+    if not words:
+        return None
+    terms = [f'"{w}"' for w in words]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def _highlight(snippet: str) -> str:
+    return str(escape(snippet)).replace(_MARK_START, '<mark>').replace(_MARK_END, '</mark>')
+
+
+def search_posts(query: str, limit: int = 10, offset: int = 0) -> list[dict]:
+    """Ranked matches (title weighted above body) with highlighted snippets"""
+    match = build_match_query(query)
+    if match is None:
+        return []
+    try:
+        rows = get_db(readonly=True).execute(
+            f"""
+            SELECT p.id, p.file, p.title, p.date,
+                   snippet(posts_fts, 1, '{_MARK_START}', '{_MARK_END}', '…', 16)
+            FROM posts_fts JOIN posts p ON p.id = posts_fts.rowid
+            WHERE posts_fts MATCH ?
+            ORDER BY bm25(posts_fts, 10.0, 1.0)
+            LIMIT ? OFFSET ?
+            """,
+            [match, limit, offset]
+        ).fetchall()
+        return [
+            {'id': r[0], 'file': r[1], 'title': r[2], 'date': r[3], 'snippet': _highlight(r[4])}
+            for r in rows
+        ]
+    except Exception as e:
+        logger.error(f"Error searching posts for {query!r}: {e}")
+        return []
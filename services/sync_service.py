@@ -1,70 +1,429 @@
 """Sync service - syncs posts from filesystem to database"""
 import os
+import json
+import time
+import hashlib
 import logging
+import threading
+from datetime import datetime, timezone
+from concurrent.futures import ProcessPoolExecutor
 from sqlite3 import Connection
 from flask import current_app
-from utils.db import get_db
-from utils.markdown_parser import read_markdown_file, extract_metadata
+from utils.db import get_db, get_sync_generation, has_fts
+from utils.markdown_parser import (
+    read_markdown_file, extract_metadata, render_markdown, html_to_text, split_front_matter, find_missing_images,
+    referenced_images
+)
+from services.image_service import update_image_variants, load_image_index
+from services.asset_service import refresh_asset_manifest, load_asset_manifest
+from utils.page_cache import purge_page_cache
+from utils.compression import response_cache
+from utils.metrics import is_enabled, observe
+from utils.highlight import configure_highlight_cache, highlight_cache_path, prune_highlight_cache
 
 logger = logging.getLogger(__name__)
 EXCLUDED_FILES = {'about.md'}
+DRIFT_QUEUE_NAME = 'drift.queue'
 
+# Title drift seen by request handlers in this worker, reconciled by the next sync
+_drift_lock = threading.Lock()
+_drift: dict = {'detected': 0, 'queued': {}}
+# Last sync generation this worker has seen
+_observed: dict = {'generation': None, 'checked': 0.0}
+# Last sync run in this process, changed or not; only runs that changed posts are written to sync_meta
+_last_run: dict = {}
 
-def sync_posts_to_db(posts_dir: str | None = None) -> bool:
-    """Sync markdown files to database"""
+
+def drift_queue_path() -> str:
+    """File shared by all workers listing posts whose stored row is out of date"""
+    return os.path.join(os.path.dirname(current_app.config['DATABASE']), DRIFT_QUEUE_NAME)
+
+
+def queue_drift(filename: str, title: str) -> None:
+    """Ask the syncing process to re-read a post whose file title differs from the database.
+
+    Appends one line to the shared queue file instead of writing the
+    database from the request path. Repeats of the same title are queued once.
+    """
+    with _drift_lock:
+        if _drift['queued'].get(filename) == title:
+            return
+        _drift['queued'][filename] = title
+        _drift['detected'] += 1
+    try:
+        with open(drift_queue_path(), 'a', encoding='utf-8') as f:
+            f.write(f"{filename}\n")
+    except OSError as e:
+        logger.error(f"Could not queue title drift of {filename}: {e}")
+
+
+def drift_stats() -> dict:
+    """Drift detected by this worker and reconciled by sync across all workers"""
+    try:
+        row = get_db(readonly=True).execute(
+            "SELECT value FROM sync_meta WHERE key = 'drift_reconciled'"
+        ).fetchone()
+        reconciled = row[0] if row else 0
+    except Exception:
+        reconciled = 0
+    with _drift_lock:
+        return {'detected': _drift['detected'], 'reconciled': reconciled}
+
+
+def _take_drift_queue(path: str) -> set[str]:
+    """Atomically claim and read the queued filenames"""
+    claimed = f"{path}.{os.getpid()}"
+    try:
+        os.replace(path, claimed)
+    except FileNotFoundError:
+        return set()
+    try:
+        with open(claimed, 'r', encoding='utf-8') as f:
+            return {line.strip() for line in f if line.strip()}
+    finally:
+        os.remove(claimed)
+
+
+def sync_posts_to_db(posts_dir: str | None = None, filenames: set[str] | None = None, jobs: int = 1) -> bool:
+    """Sync markdown files to database, optionally only the given filenames.
+
+    With jobs > 1, changed files are parsed and rendered in a process pool;
+    all database writes still happen here. Posts queued by queue_drift are
+    always re-parsed, whatever their file stat says.
+    """
     try:
         if posts_dir is None:
             posts_dir = current_app.config['POSTS_DIR']
-        
+
         if not os.path.exists(posts_dir):
             return False
-        
-        all_md_files = {f for f in os.listdir(posts_dir) if f.endswith('.md')}
-        files_to_sync = all_md_files - EXCLUDED_FILES
-        
+
+        started, started_at = time.perf_counter(), time.time()
+        static_dir = current_app.config['STATIC_DIR']
+        assets_path = current_app.config['ASSET_MANIFEST']
+        images_changed = set()
+        if filenames is None:
+            images_changed = {f"images/{p}" for p in update_image_variants(
+                static_dir, current_app.config['IMAGE_VARIANT_WIDTHS'],
+                current_app.config['IMAGE_VARIANT_QUALITY'], jobs
+            )}
+            assets_changed = refresh_asset_manifest(static_dir, assets_path)
+            images_changed |= {p for p in assets_changed if p.startswith('images/')}
+        drifted = _take_drift_queue(drift_queue_path())
+        if filenames is not None:
+            filenames = filenames | drifted
+        all_md_files = _scan_posts_dir(posts_dir, filenames)
+
         db = get_db()
+        manifest = {row[0]: (row[1], row[2]) for row in db.execute(
+            "SELECT file, size, mtime_ns FROM post_files"
+        ).fetchall()}
+        changed = [
+            f for f, stat in all_md_files.items()
+            if f not in EXCLUDED_FILES and (f in drifted or manifest.get(f) != stat)
+        ]
+        # Changed images alter the markup (variants, fingerprints) of the posts embedding them
+        embedding = _posts_embedding(posts_dir, all_md_files, images_changed)
+        changed += sorted(embedding - set(changed))
+        rerender = drifted | embedding
+        deleted = (set(manifest) | _db_post_files(db)) - set(all_md_files)
+        if filenames is not None:
+            deleted &= filenames
+        scanned = time.perf_counter()
+
+        if not changed and not deleted:
+            if is_enabled():
+                observe('blog_sync_phase_duration_seconds', scanned - started, phase='scan')
+            logger.debug(f"Sync: {len(all_md_files)} files unchanged, scan {scanned - started:.3f}s")
+            _last_run.update(at=started_at, ms=round((scanned - started) * 1000, 1))
+            return True
+
         db_posts = {row[1]: row for row in db.execute(
-            "SELECT id, file, title, date FROM posts"
+            "SELECT id, file, content_hash FROM posts"
         ).fetchall()}
-        
-        for filename in files_to_sync:
-            _add_or_update_post(os.path.join(posts_dir, filename), filename, db, db_posts.get(filename))
-        
-        _remove_deleted_posts(db, db_posts, all_md_files, posts_dir)
+
+        tasks = [
+            (os.path.join(posts_dir, f), f, all_md_files[f],
+             db_posts[f][2] if f in db_posts and f not in rerender else None,
+             static_dir, assets_path)
+            for f in changed
+        ]
+        if jobs > 1 and len(tasks) > 1:
+            with ProcessPoolExecutor(max_workers=jobs, initializer=configure_highlight_cache,
+                                     initargs=(highlight_cache_path(),)) as pool:
+                parsed = list(pool.map(_parse_post_task, tasks, chunksize=max(1, len(tasks) // (jobs * 4))))
+        else:
+            parsed = [_parse_post(*task) for task in tasks]
+        diff = _build_diff([p for p in parsed if p], db_posts, deleted)
+        diff['drift'] = len(drifted & {p['file'] for p in parsed if p})
+        diffed = time.perf_counter()
+
+        _apply_diff(db, diff)
+        if filenames is None:
+            prune_highlight_cache(current_app.config['HIGHLIGHT_CACHE_MAX_ENTRIES'])
+        if diff['inserts'] or diff['updates'] or diff['deletes'] or diff['unpublish']:
+            purge_page_cache(get_sync_generation())
+        finished = time.perf_counter()
+
+        if is_enabled():
+            for phase, seconds in (('scan', scanned - started), ('parse', diffed - scanned),
+                                   ('write', finished - diffed)):
+                observe('blog_sync_phase_duration_seconds', seconds, phase=phase)
+        logger.info(
+            f"Sync: {len(diff['inserts'])} added, {len(diff['updates'])} updated, "
+            f"{len(diff['deletes'])} removed, {len(diff['unpublish'])} drafts, "
+            f"{len(diff['touched'])} touched, {diff['drift']} drifted; "
+            f"scan {scanned - started:.3f}s, parse {diffed - scanned:.3f}s "
+            f"({len(tasks) / max(diffed - scanned, 1e-9):.0f} files/s, {jobs} jobs), "
+            f"write {finished - diffed:.3f}s"
+        )
+        _record_sync(db, started_at, finished - started)
         return True
-        
+
     except Exception as e:
         logger.error(f"Error syncing posts: {e}")
         return False
 
 
-def _add_or_update_post(filepath: str, filename: str, db: Connection, existing_row: tuple | None) -> bool:
-    """Add new post or update existing one"""
+def _record_sync(db: Connection, started_at: float, seconds: float) -> None:
+    """Remember when, how long and in which process the last sync that changed posts ran"""
+    _last_run.update(at=started_at, ms=round(seconds * 1000, 1))
+    with db:
+        db.executemany("INSERT OR REPLACE INTO sync_meta (key, value) VALUES (?, ?)", [
+            ('last_sync_at', started_at), ('last_sync_ms', round(seconds * 1000, 1)), ('sync_pid', os.getpid())
+        ])
+
+
+def record_sync_leader() -> None:
+    """Mark this process as the one holding the sync lock"""
+    db = get_db()
+    with db:
+        db.executemany("INSERT OR REPLACE INTO sync_meta (key, value) VALUES (?, ?)", [
+            ('leader_pid', os.getpid()), ('leader_since', time.time())
+        ])
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def get_sync_status() -> dict:
+    """Sync generation, last sync that changed posts and current leader as recorded in sync_meta.
+
+    Unchanged runs write nothing; the last run of any kind is only known to
+    the process that ran it (local_last_run_*, set in the leader).
+    """
+    meta = {row[0]: row[1] for row in get_db(readonly=True).execute("SELECT key, value FROM sync_meta")}
+    as_iso = lambda ts: datetime.fromtimestamp(ts, timezone.utc).isoformat(timespec='seconds') if ts else None
+    leader_pid = meta.get('leader_pid')
+    return {
+        'generation': meta.get('generation', 0),
+        'last_sync_at': as_iso(meta.get('last_sync_at')),
+        'last_sync_ms': meta.get('last_sync_ms'),
+        'last_sync_pid': meta.get('sync_pid'),
+        'local_last_run_at': as_iso(_last_run.get('at')),
+        'local_last_run_ms': _last_run.get('ms'),
+        'leader_pid': leader_pid,
+        'leader_since': as_iso(meta.get('leader_since')),
+        'leader_alive': _pid_alive(leader_pid) if leader_pid else False,
+        'worker_pid': os.getpid(),
+        'observed_generation': _observed['generation'],
+    }
+
+
+def observe_sync_generation() -> None:
+    """Drop this worker's cached responses once another process commits a new generation.
+
+    Cached responses are keyed by ETags that already include the generation,
+    so this only frees memory held by superseded pages. Checked at most
+    every GENERATION_CHECK_SECONDS.
+    """
+    now = time.monotonic()
+    if now - _observed['checked'] < current_app.config['GENERATION_CHECK_SECONDS']:
+        return
+    _observed['checked'] = now
+    generation = get_sync_generation()
+    previous, _observed['generation'] = _observed['generation'], generation
+    if previous is not None and generation > previous:
+        response_cache.clear()
+        logger.debug(f"Sync generation {previous} -> {generation}: cleared response cache (pid {os.getpid()})")
+
+
+def _scan_posts_dir(posts_dir: str, filenames: set[str] | None = None) -> dict[str, tuple[int, int]]:
+    """Stat every markdown file once, returning {filename: (size, mtime_ns)}"""
+    files = {}
+    if filenames is not None:
+        for name in filenames:
+            try:
+                st = os.stat(os.path.join(posts_dir, name))
+            except FileNotFoundError:
+                continue
+            if name.endswith('.md'):
+                files[name] = (st.st_size, st.st_mtime_ns)
+        return files
+
+    with os.scandir(posts_dir) as it:
+        for entry in it:
+            if entry.name.endswith('.md') and entry.is_file():
+                st = entry.stat()
+                files[entry.name] = (st.st_size, st.st_mtime_ns)
+    return files
+
+
+def _posts_embedding(posts_dir: str, files: dict, images: set[str]) -> set[str]:
+    """Posts whose markdown embeds any of the given static/ image paths"""
+    if not images:
+        return set()
+    return {
+        f for f in files if f not in EXCLUDED_FILES
+        and images.intersection(referenced_images(read_markdown_file(os.path.join(posts_dir, f))))
+    }
+
+
+def _db_post_files(db: Connection) -> set[str]:
+    """Filenames currently present in the posts table"""
+    return {row[0] for row in db.execute("SELECT file FROM posts").fetchall()}
+
+
+def _parse_post(filepath: str, filename: str, stat: tuple[int, int], known_hash: str | None = None,
+                static_dir: str | None = None, assets_path: str | None = None) -> dict | None:
+    """Read a post file and compute everything stored for it.
+
+    Rendering is skipped (html is None) when the content hash equals known_hash,
+    and for drafts, which are not published.
+    """
     try:
         content = read_markdown_file(filepath)
         if not content:
-            return False
-        
+            return None
+
+        content_hash = hashlib.sha256(content.encode('utf-8')).hexdigest()
+        if content_hash == known_hash:
+            return {'file': filename, 'stat': stat, 'content_hash': content_hash, 'html': None}
+
+        assets = load_asset_manifest(assets_path) if assets_path else None
+        if assets is not None:
+            for path in find_missing_images(content, assets):
+                logger.warning(f"Image not found in {filename}: {path}")
+
         metadata = extract_metadata(content, filepath)
+        if metadata['draft']:
+            return {'file': filename, 'stat': stat, 'content_hash': content_hash, 'html': None, 'draft': True}
+        html = render_markdown(content, image_index=load_image_index(static_dir) if static_dir else None, assets=assets)
         title = metadata['title'] or os.path.splitext(filename)[0].replace('-', ' ').replace('_', ' ').title()
-        date = metadata['date']
-        
-        if existing_row:
-            db.execute("UPDATE posts SET title = ?, date = ? WHERE id = ?", [title, date, existing_row[0]])
-        else:
-            max_id = db.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM posts").fetchone()[0]
-            db.execute("INSERT INTO posts (id, file, title, date) VALUES (?, ?, ?, ?)", [max_id, filename, title, date])
-        
-        db.commit()
-        return True
+        return {
+            'file': filename,
+            'stat': stat,
+            'content_hash': content_hash,
+            'html': html,
+            # Versions the post page: markup also depends on image variants and asset fingerprints
+            'render_hash': hashlib.sha256(json.dumps([title, metadata['tags'], html]).encode('utf-8')).hexdigest(),
+            'text': html_to_text(html),
+            'title': title,
+            'date': metadata['date'],
+            'tags': metadata['tags'],
+            'summary': metadata['summary'],
+            'word_count': len(split_front_matter(content)[1].split()),
+        }
     except Exception as e:
-        logger.error(f"Error updating post {filename}: {e}")
-        return False
+        logger.error(f"Error parsing post {filename}: {e}")
+        return None
+
+
+def _parse_post_task(task: tuple) -> dict | None:
+    """Process pool entry point for _parse_post"""
+    return _parse_post(*task)
+
+
+def _build_diff(parsed: list[dict], db_posts: dict, deleted: set[str]) -> dict[str, list]:
+    """Sort parsed posts into inserts, updates, unpublished drafts and manifest-only refreshes"""
+    diff: dict[str, list] = {
+        'inserts': [], 'updates': [], 'touched': [], 'deletes': [], 'unpublish': [],
+        'manifest': [], 'search': [], 'tags': []
+    }
+
+    for post in parsed:
+        existing = db_posts.get(post['file'])
+        diff['manifest'].append([post['file'], *post['stat'], post['content_hash']])
+
+        if post.get('draft'):
+            # Drafts keep their manifest entry (so they are not re-read) but leave the site
+            if existing:
+                diff['unpublish'].append([post['file']])
+            continue
+
+        if post['html'] is None:
+            # Touched but not edited: only the manifest entry changes
+            diff['touched'].append(post['file'])
+            continue
+
+        values = [
+            post['title'], post['date'], post['html'], post['word_count'], post['content_hash'],
+            post['summary'], post['render_hash']
+        ]
+        diff['search'].append([post['title'], post['text'], post['file']])
+        diff['tags'] += [[tag, post['file']] for tag in post['tags']]
+        if existing:
+            diff['updates'].append([*values, existing[0]])
+        else:
+            diff['inserts'].append([post['file'], *values])
+
+    diff['deletes'] = [[filename] for filename in deleted]
+    return diff
+
 
+def _apply_diff(db: Connection, diff: dict[str, list]) -> None:
+    """Write all changes of a sync run in a single transaction.
 
-def _remove_deleted_posts(db: Connection, db_posts: dict, existing_files: set, posts_dir: str) -> None:
-    """Remove posts from database that no longer exist on filesystem"""
-    for filename, row in db_posts.items():
-        if filename not in existing_files or not os.path.exists(os.path.join(posts_dir, filename)):
-            db.execute("DELETE FROM posts WHERE id = ?", [row[0]])
-            db.commit()
+    post_tags and archive_months are derived from posts here, so tag and
+    archive pages never have to read post files.
+    """
+    fts = has_fts(db)
+    removed = diff['deletes'] + diff['unpublish']
+    changed = removed + [[file] for *_, file in diff['search']]
+    with db:
+        if fts:
+            db.executemany("DELETE FROM posts_fts WHERE rowid IN (SELECT id FROM posts WHERE file = ?)", changed)
+        db.executemany("DELETE FROM post_tags WHERE post_id IN (SELECT id FROM posts WHERE file = ?)", changed)
+        db.executemany(
+            "INSERT INTO posts (file, title, date, html, word_count, content_hash, summary, render_hash) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            diff['inserts']
+        )
+        db.executemany(
+            "UPDATE posts SET title = ?, date = ?, html = ?, word_count = ?, content_hash = ?, summary = ?, "
+            "render_hash = ? WHERE id = ?",
+            diff['updates']
+        )
+        db.executemany(
+            "INSERT OR REPLACE INTO post_files (file, size, mtime_ns, content_hash) VALUES (?, ?, ?, ?)",
+            diff['manifest']
+        )
+        if fts:
+            db.executemany(
+                "INSERT INTO posts_fts (rowid, title, body) SELECT id, ?, ? FROM posts WHERE file = ?",
+                diff['search']
+            )
+        db.executemany(
+            "INSERT OR IGNORE INTO post_tags (tag, date, post_id) SELECT ?, date, id FROM posts WHERE file = ?",
+            diff['tags']
+        )
+        db.executemany("DELETE FROM posts WHERE file = ?", removed)
+        db.executemany("DELETE FROM post_files WHERE file = ?", diff['deletes'])
+        if diff['inserts'] or diff['updates'] or removed:
+            db.execute("DELETE FROM archive_months")
+            db.execute(
+                "INSERT INTO archive_months (month, post_count) "
+                "SELECT substr(date, 1, 7), COUNT(*) FROM posts WHERE date IS NOT NULL GROUP BY 1"
+            )
+            db.execute("UPDATE sync_meta SET value = value + 1 WHERE key = 'generation'")
+        if diff.get('drift'):
+            db.execute(
+                "UPDATE sync_meta SET value = value + ? WHERE key = 'drift_reconciled'", [diff['drift']]
+            )
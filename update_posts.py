@@ -4,10 +4,12 @@ Script to sync posts from filesystem to database.
 Run this script to manually update the blog database with all posts.
 
 Usage:
-    python update_posts.py
+    python update_posts.py [--jobs N]
 """
+import os
 import sys
 import logging
+import argparse
 
 logging.basicConfig(
     level=logging.INFO,
@@ -18,13 +20,20 @@ logger = logging.getLogger(__name__)
 
 def main():
     """Run post sync within Flask app context"""
+    parser = argparse.ArgumentParser(description="Sync posts from filesystem to database")
+    parser.add_argument('--jobs', '-j', type=int, default=1, help="processes used to parse and render posts")
+    args = parser.parse_args()
+    
+    # Sync once here instead of starting background sync; passing a test
+    # config to create_app would skip instance/config.py
+    os.environ['SYNC_AUTOSTART'] = '0'
     from app import create_app
     from services.sync_service import sync_posts_to_db
     
     flask_app = create_app()
     
     with flask_app.app_context():
-        if sync_posts_to_db():
+        if sync_posts_to_db(jobs=args.jobs):
             logger.info("Posts synced successfully")
             return 0
         else:
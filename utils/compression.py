@@ -0,0 +1,173 @@
+"""Precompressed (gzip / brotli) responses for pages and static files"""
+import os
+import gzip
+import zlib
+import mimetypes
+import logging
+from typing import Callable, Iterable, Iterator
+from flask import Response, current_app, request, send_file, send_from_directory
+from utils.render_cache import RenderCache
+from services.asset_service import asset_matches_disk
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+COMPRESSIBLE_TYPES = {
+    'text/html', 'text/css', 'text/plain', 'text/xml', 'text/javascript',
+    'application/javascript', 'application/json', 'application/xml', 'image/svg+xml',
+}
+
+# Whole rendered responses keyed by URL and validated by ETag
+response_cache = RenderCache()
+
+
+def available_encodings() -> list[str]:
+    """Encodings this process can produce, most preferred first"""
+    return ['br', 'gzip'] if brotli is not None else ['gzip']
+
+
+def choose_encoding() -> str | None:
+    """Best encoding the client accepts, or None for identity"""
+    accepted = request.accept_encodings
+    for encoding in available_encodings():
+        if accepted[encoding] > 0:
+            return encoding
+    return None
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    """Compress data with the configured level for the encoding"""
+    if encoding == 'br':
+        return brotli.compress(data, quality=current_app.config['BROTLI_QUALITY'])
+    return gzip.compress(data, compresslevel=current_app.config['GZIP_LEVEL'], mtime=0)
+
+
+def is_compressible(mimetype: str | None, size: int) -> bool:
+    return mimetype in COMPRESSIBLE_TYPES and size >= current_app.config['COMPRESS_MIN_BYTES']
+
+
+def cached_response(etag: str) -> Response | None:
+    """Serve a previously rendered response for this URL and ETag, compressing once per encoding"""
+    key = request.full_path
+    entry = response_cache.get(key, etag)
+    if entry is None:
+        return None
+
+    encoding = choose_encoding() if is_compressible(entry['mimetype'], len(entry['identity'])) else None
+    if encoding and encoding not in entry:
+        entry = {**entry, encoding: compress(entry['identity'], encoding)}
+        response_cache.put(key, etag, entry)
+
+    response = Response(entry[encoding or 'identity'], mimetype=entry['mimetype'])
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+def remember_response(etag: str, entry: dict) -> Response | None:
+    """Keep an entry rendered elsewhere (another worker) and serve it like a local hit"""
+    response_cache.put(request.full_path, etag, entry)
+    return cached_response(etag)
+
+
+def store_response(etag: str, response: Response,
+                   on_store: Callable[[str, dict], None] | None = None) -> Response:
+    """Remember a freshly rendered 200 response and return it compressed if accepted.
+
+    on_store, if given, also receives the stored entry (e.g. to share it).
+    """
+    if response.status_code != 200 or response.direct_passthrough or response.is_streamed:
+        return response
+    entry = {'mimetype': response.mimetype, 'identity': response.get_data()}
+    response_cache.put(request.full_path, etag, entry)
+    if on_store is not None:
+        on_store(etag, entry)
+    return cached_response(etag) or response
+
+
+def _coalesce(pieces: Iterable[str], size: int) -> Iterator[bytes]:
+    """Join the many small strings a template yields into chunks of about size bytes"""
+    buffer, buffered = [], 0
+    for piece in pieces:
+        data = piece.encode('utf-8')
+        buffer.append(data)
+        buffered += len(data)
+        if buffered >= size:
+            yield b''.join(buffer)
+            buffer, buffered = [], 0
+    if buffer:
+        yield b''.join(buffer)
+
+
+def _compress_stream(chunks: Iterable[bytes], encoding: str) -> Iterator[bytes]:
+    """Compress chunk by chunk, flushing after each so the client can render progressively"""
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=current_app.config['BROTLI_QUALITY'])
+        for chunk in chunks:
+            yield compressor.process(chunk) + compressor.flush()
+        yield compressor.finish()
+        return
+    compressor = zlib.compressobj(current_app.config['GZIP_LEVEL'], zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+
+def stream_response(pieces: Iterable[str], mimetype: str = 'text/html') -> Response:
+    """Chunked response from a template stream, compressed on the fly if accepted.
+
+    Never stored in the response cache: meant for pages too large to keep.
+    """
+    chunks = _coalesce(pieces, current_app.config['STREAM_CHUNK_BYTES'])
+    encoding = choose_encoding() if mimetype in COMPRESSIBLE_TYPES else None
+    response = Response(_compress_stream(chunks, encoding) if encoding else chunks, mimetype=mimetype)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+def _precompressed_path(filename: str, digest: str, encoding: str) -> str:
+    suffix = '.br' if encoding == 'br' else '.gz'
+    return os.path.join(current_app.config['COMPRESSED_DIR'], f"{filename}.{digest}{suffix}")
+
+
+def send_static(static_dir: str, filename: str, asset: dict | None) -> Response:
+    """send_from_directory, but serve a stored compressed copy of text assets.
+
+    asset is the file's asset manifest entry; the copy is written on first
+    request per content hash and encoding, and only while the manifest
+    entry still matches the file on disk.
+    """
+    mimetype = mimetypes.guess_type(filename)[0]
+    full_path = os.path.join(static_dir, filename)
+    encoding = None
+    if asset and is_compressible(mimetype, asset['size']) and asset_matches_disk(static_dir, filename, asset):
+        encoding = choose_encoding()
+    if encoding is None:
+        return send_from_directory(static_dir, filename)
+    digest = asset['hash']
+
+    path = _precompressed_path(filename, digest, encoding)
+    if not os.path.exists(path):
+        try:
+            with open(full_path, 'rb') as f:
+                data = compress(f.read(), encoding)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(f"{path}.tmp", 'wb') as f:
+                f.write(data)
+            os.replace(f"{path}.tmp", path)
+        except OSError as e:
+            logger.error(f"Could not precompress {filename}: {e}")
+            return send_from_directory(static_dir, filename)
+
+    response = send_file(path, mimetype=mimetype, download_name=os.path.basename(filename),
+                         etag=f"{digest}-{encoding}", conditional=True)
+    response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    return response
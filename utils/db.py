@@ -1,42 +1,232 @@
 """Database utilities"""
 import sqlite3
 import os
+import logging
+import threading
 import click
 from flask import Flask, current_app, g
 from flask.cli import with_appcontext
+from utils.markdown_parser import html_to_text
+from utils.metrics import connection_factory
 
+logger = logging.getLogger(__name__)
 
-def get_db() -> sqlite3.Connection:
-    """Get database connection from Flask g object"""
-    if 'db' not in g:
-        db_path = current_app.config['DATABASE']
-        os.makedirs(os.path.dirname(db_path), exist_ok=True)
-        g.db = sqlite3.connect(db_path)
-        g.db.row_factory = sqlite3.Row
-    return g.db
 
+class ConnectionPool:
+    """Idle SQLite connections to one database, reused across requests in this process.
 
-def close_db(e: Exception | None = None) -> None:
-    """Close database connection"""
-    db = g.pop('db', None)
-    if db:
+    Connections keep their prepared statement cache between checkouts, so
+    repeated queries skip re-parsing. Connections inherited over fork() are
+    dropped, never shared with the parent.
+    """
+
+    def __init__(self, path: str, readonly: bool, config: dict) -> None:
+        self.path = path
+        self.readonly = readonly
+        self.size = config['DB_POOL_SIZE']
+        self.config = config
+        self._idle: list[sqlite3.Connection] = []
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self.readonly:
+            db = sqlite3.connect(
+                f"file:{self.path}?mode=ro", uri=True, check_same_thread=False, factory=connection_factory(),
+                timeout=self.config['DB_BUSY_TIMEOUT'], cached_statements=self.config['DB_STATEMENT_CACHE']
+            )
+        else:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            db = sqlite3.connect(
+                self.path, check_same_thread=False, factory=connection_factory(),
+                timeout=self.config['DB_BUSY_TIMEOUT'], cached_statements=self.config['DB_STATEMENT_CACHE']
+            )
+            db.execute(f"PRAGMA journal_mode = {self.config['SQLITE_JOURNAL_MODE']}")
+        for name, value in self.config['SQLITE_PRAGMAS'].items():
+            db.execute(f"PRAGMA {name} = {value}")
+        db.row_factory = sqlite3.Row
+        return db
+
+    def acquire(self) -> sqlite3.Connection:
+        with self._lock:
+            if self._pid != os.getpid():
+                self._idle, self._pid = [], os.getpid()
+            if self._idle:
+                return self._idle.pop()
+        return self._connect()
+
+    def release(self, db: sqlite3.Connection) -> None:
+        if db.in_transaction:
+            db.rollback()
+        with self._lock:
+            if self._pid == os.getpid() and len(self._idle) < self.size:
+                self._idle.append(db)
+                return
         db.close()
 
+    def close_all(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for db in idle:
+            db.close()
+
+
+_pools: dict[tuple[str, bool], ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(readonly: bool = False, path: str | None = None) -> ConnectionPool:
+    """Connection pool for the app's database, or another SQLite file at path"""
+    key = (path or current_app.config['DATABASE'], readonly)
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.setdefault(key, ConnectionPool(key[0], readonly, current_app.config))
+    return pool
+
+
+def get_db(readonly: bool = False) -> sqlite3.Connection:
+    """Get a pooled database connection for this app context.
+
+    Request handlers that only read should pass readonly=True; those
+    connections open the file read-only and never take the write lock.
+    """
+    attr = 'db_ro' if readonly else 'db'
+    if attr not in g:
+        setattr(g, attr, get_pool(readonly).acquire())
+    return g.get(attr)
+
+
+def close_db(e: Exception | None = None) -> None:
+    """Return this context's connections to their pools"""
+    for attr, readonly in (('db', False), ('db_ro', True)):
+        db = g.pop(attr, None)
+        if db:
+            get_pool(readonly).release(db)
+
+
+def close_pools() -> None:
+    """Close every idle pooled connection in this process (gunicorn.conf.py calls it before fork)"""
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.close_all()
+
+
+# Columns added after the initial schema, applied to existing databases
+POST_COLUMNS = {
+    'html': 'TEXT',
+    'word_count': 'INTEGER',
+    'content_hash': 'TEXT',
+    'summary': 'TEXT',
+    'render_hash': 'TEXT',
+}
+
+
+# Bump when init_db changes the schema; workers skip init_db at the current version
+SCHEMA_VERSION = 4
+# Databases older than this are re-parsed by the next sync to fill in new columns
+# (version 4: tags normalized without path-unsafe characters)
+REPARSE_BELOW_VERSION = 4
+
 
 def init_db() -> None:
     """Initialize database schema"""
     db = get_db()
+    version = db.execute("PRAGMA user_version").fetchone()[0]
+    if version == SCHEMA_VERSION:
+        return
     db.execute("""
         CREATE TABLE IF NOT EXISTS posts (
             id INTEGER PRIMARY KEY,
             file TEXT,
             title TEXT,
-            date TEXT
+            date TEXT,
+            html TEXT,
+            word_count INTEGER,
+            content_hash TEXT,
+            summary TEXT,
+            render_hash TEXT
+        )
+    """)
+    db.execute("""
+        CREATE TABLE IF NOT EXISTS post_files (
+            file TEXT PRIMARY KEY,
+            size INTEGER,
+            mtime_ns INTEGER,
+            content_hash TEXT
+        )
+    """)
+    db.execute("""
+        CREATE TABLE IF NOT EXISTS sync_meta (
+            key TEXT PRIMARY KEY,
+            value INTEGER
+        )
+    """)
+    db.execute("""
+        CREATE TABLE IF NOT EXISTS post_tags (
+            tag TEXT,
+            date TEXT,
+            post_id INTEGER,
+            PRIMARY KEY (tag, date, post_id)
         )
     """)
+    db.execute("""
+        CREATE TABLE IF NOT EXISTS archive_months (
+            month TEXT PRIMARY KEY,
+            post_count INTEGER
+        )
+    """)
+    db.execute("INSERT OR IGNORE INTO sync_meta (key, value) VALUES ('generation', 0)")
+    db.execute("INSERT OR IGNORE INTO sync_meta (key, value) VALUES ('drift_reconciled', 0)")
+    db.execute("CREATE INDEX IF NOT EXISTS idx_posts_date_id ON posts (date, id)")
+    db.execute("CREATE INDEX IF NOT EXISTS idx_posts_file ON posts (file)")
+    db.execute("CREATE INDEX IF NOT EXISTS idx_post_tags_post ON post_tags (post_id)")
+    existing = {row[1] for row in db.execute("PRAGMA table_info(posts)").fetchall()}
+    for name, decl in POST_COLUMNS.items():
+        if name not in existing:
+            db.execute(f"ALTER TABLE posts ADD COLUMN {name} {decl}")
+    _init_fts(db)
+    if version < REPARSE_BELOW_VERSION:
+        # Forget file stats and hashes so every post is parsed and rendered again
+        db.execute("DELETE FROM post_files")
+        db.execute("UPDATE posts SET content_hash = NULL")
+    db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
     db.commit()
 
 
+def has_fts(db: sqlite3.Connection) -> bool:
+    """True if the full-text index exists (SQLite built with FTS5)"""
+    return db.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'posts_fts'"
+    ).fetchone() is not None
+
+
+def get_sync_generation() -> int:
+    """Counter bumped by every sync run that changed the posts table"""
+    try:
+        row = get_db(readonly=True).execute("SELECT value FROM sync_meta WHERE key = 'generation'").fetchone()
+        return row[0] if row else 0
+    except Exception as e:
+        logger.error(f"Error reading sync generation: {e}")
+        return 0
+
+
+def _init_fts(db: sqlite3.Connection) -> None:
+    """Create the FTS5 index over posts (rowid = posts.id), backfilling existing rows"""
+    if has_fts(db):
+        return
+    try:
+        db.execute("CREATE VIRTUAL TABLE posts_fts USING fts5(title, body, tokenize = 'porter unicode61')")
+    except sqlite3.OperationalError as e:
+        logger.warning(f"Full-text search disabled, FTS5 unavailable: {e}")
+        return
+    db.executemany(
+        "INSERT INTO posts_fts (rowid, title, body) VALUES (?, ?, ?)",
+        [(r[0], r[1], html_to_text(r[2] or '')) for r in db.execute("SELECT id, title, html FROM posts")]
+    )
+
+
 @click.command('init-db')
 @with_appcontext
 def init_db_command() -> None:
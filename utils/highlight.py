@@ -0,0 +1,124 @@
+"""Shared cache of Pygments-highlighted code blocks, kept in its own SQLite file.
+
+codehilite (and fenced_code through it) run Pygments for every code block
+on every render. Once installed, CachedCodeHilite serves a block it has
+highlighted before from the cache, keyed by language, code, style and
+formatter options, so each distinct block is highlighted once across
+posts, workers and restarts.
+"""
+import os
+import json
+import hashlib
+import sqlite3
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+_state: dict = {'path': None, 'installed': False, 'hits': 0, 'misses': 0}
+_local = threading.local()
+
+
+def configure_highlight_cache(path: str | None) -> None:
+    """Use the cache file at path, or disable caching with None (also a process pool initializer)"""
+    _state['path'] = path
+    if path:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+
+def highlight_cache_path() -> str | None:
+    return _state['path']
+
+
+def _connect() -> sqlite3.Connection | None:
+    """This thread's connection to the cache file"""
+    path = _state['path']
+    cached = getattr(_local, 'db', None)
+    if cached and cached[0] == (path, os.getpid()):
+        return cached[1]
+    db = sqlite3.connect(path, timeout=1.0)
+    db.execute("PRAGMA journal_mode = wal")
+    db.execute("PRAGMA synchronous = NORMAL")
+    db.execute("CREATE TABLE IF NOT EXISTS fragments (key TEXT PRIMARY KEY, html TEXT)")
+    _local.db = ((path, os.getpid()), db)
+    return db
+
+
+def _lookup(key: str) -> str | None:
+    try:
+        row = _connect().execute("SELECT html FROM fragments WHERE key = ?", [key]).fetchone()
+    except sqlite3.Error as e:
+        logger.error(f"Error reading highlight cache: {e}")
+        return None
+    return row[0] if row else None
+
+
+def _store(key: str, html: str) -> None:
+    try:
+        db = _connect()
+        with db:
+            db.execute("INSERT OR REPLACE INTO fragments (key, html) VALUES (?, ?)", [key, html])
+    except sqlite3.Error as e:
+        # Losing a cache write only costs a future re-highlight
+        logger.debug(f"Highlighted block not cached: {e}")
+
+
+def install_highlight_cache() -> None:
+    """Make codehilite and fenced_code build CachedCodeHilite instead of CodeHilite.
+
+    Both extensions look the class up by module-level name at render time
+    and offer no other hook, so the name is rebound once per process.
+    """
+    if _state['installed']:
+        return
+    import pygments
+    from markdown.extensions import codehilite, fenced_code
+
+    class CachedCodeHilite(codehilite.CodeHilite):
+        def hilite(self, shebang: bool = True) -> str:
+            if not _state['path']:
+                return super().hilite(shebang)
+            raw = json.dumps([
+                pygments.__version__, self.lang, self.src, shebang, self.guess_lang, self.use_pygments,
+                self.lang_prefix, str(self.pygments_formatter), self.options,
+            ], sort_keys=True, default=str)
+            key = hashlib.sha256(raw.encode('utf-8')).hexdigest()
+            html = _lookup(key)
+            if html is not None:
+                _state['hits'] += 1
+                return html
+            _state['misses'] += 1
+            html = super().hilite(shebang)
+            _store(key, html)
+            return html
+
+    codehilite.CodeHilite = fenced_code.CodeHilite = CachedCodeHilite
+    _state['installed'] = True
+
+
+def prune_highlight_cache(max_entries: int) -> None:
+    """Keep only the most recently stored max_entries fragments"""
+    if not _state['path']:
+        return
+    try:
+        db = _connect()
+        with db:
+            deleted = db.execute(
+                "DELETE FROM fragments WHERE rowid NOT IN "
+                "(SELECT rowid FROM fragments ORDER BY rowid DESC LIMIT ?)", [max_entries]
+            ).rowcount
+        if deleted:
+            logger.info(f"Highlight cache: pruned {deleted} fragments")
+    except sqlite3.Error as e:
+        logger.error(f"Error pruning highlight cache: {e}")
+
+
+def highlight_cache_stats() -> dict:
+    """Hits and misses in this worker plus the number of stored fragments"""
+    if not _state['path']:
+        return {'enabled': False}
+    try:
+        fragments = _connect().execute("SELECT COUNT(*) FROM fragments").fetchone()[0]
+    except sqlite3.Error:
+        fragments = None
+    return {'enabled': True, 'hits': _state['hits'], 'misses': _state['misses'], 'fragments': fragments}
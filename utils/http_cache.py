@@ -0,0 +1,100 @@
+"""HTTP conditional request helpers (ETag / Cache-Control)"""
+import os
+import re
+import hashlib
+from typing import Callable
+from flask import Flask, Response, current_app, make_response, request
+from flask.typing import ResponseReturnValue
+from utils.compression import cached_response, choose_encoding, remember_response, store_response
+from utils.page_cache import load_page, page_cache_enabled, save_page
+from services.asset_service import load_asset_manifest
+
+
+def _template_paths(app: Flask) -> list[str]:
+    templates_dir = os.path.join(app.root_path, app.template_folder or 'templates')
+    if not os.path.isdir(templates_dir):
+        return []
+    return sorted(os.path.join(templates_dir, f) for f in os.listdir(templates_dir))
+
+
+def compute_build_id(app: Flask) -> str:
+    """Fingerprint of the templates' and config's content so a deploy changes every ETag"""
+    digest = hashlib.sha256()
+    for path in [os.path.join(app.root_path, 'config.py'), *_template_paths(app)]:
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            continue
+        digest.update(f"{os.path.basename(path)}:{len(data)}:".encode('utf-8') + data)
+    return digest.hexdigest()[:12]
+
+
+def find_template_assets(app: Flask) -> list[str]:
+    """Static files the templates link with asset_url('...')"""
+    found = set()
+    for path in _template_paths(app):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                found.update(re.findall(r"asset_url\(\s*['\"]([^'\"]+)['\"]", f.read()))
+        except (OSError, UnicodeDecodeError):
+            continue
+    return sorted(found)
+
+
+def template_assets_version() -> str:
+    """Current content hashes of the template assets, whose ?v= fingerprints every page embeds"""
+    assets = load_asset_manifest(current_app.config['ASSET_MANIFEST'])
+    return ','.join(str((assets.get(p) or {}).get('hash')) for p in current_app.config['TEMPLATE_ASSETS'])
+
+
+def make_etag(*parts: object) -> str:
+    """Strong ETag value from the content version parts plus the build id and template asset hashes"""
+    raw = ':'.join(str(p) for p in (current_app.config['BUILD_ID'], template_assets_version(), *parts))
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()[:32]
+
+
+def _finish(response: Response, etag: str, route: str) -> Response:
+    # Each content-coding is a distinct representation with its own ETag
+    encoding = response.headers.get('Content-Encoding')
+    response.set_etag(f"{etag}-{encoding}" if encoding else etag)
+    return apply_cache_control(response, route)
+
+
+def conditional(route: str, etag: str | None, build: Callable[[], ResponseReturnValue]) -> Response:
+    """Answer 304 when the client's If-None-Match matches, otherwise call build.
+
+    build is only invoked on a miss, so a revalidation never renders, and
+    responses already rendered for this URL and ETag are served as stored
+    (compressed) bytes, from this worker's memory or, for routes in
+    PAGE_CACHE_ROUTES, from the page cache shared by all workers.
+    """
+    if etag is None:
+        return make_response(build())
+    # The 304 must carry the validator the matching 200 would: suffixed with the
+    # encoding negotiated for this request, or bare for an uncompressed body
+    encoding = choose_encoding()
+    candidates = ([f"{etag}-{encoding}"] if encoding else []) + [etag]
+    matched = next((tag for tag in candidates if request.if_none_match.contains_weak(tag)), None)
+    if matched is not None:
+        response = Response(status=304)
+        response.set_etag(matched)
+        response.vary.add('Accept-Encoding')
+        return apply_cache_control(response, route)
+    response = cached_response(etag)
+    if response is None and page_cache_enabled(route):
+        entry = load_page(etag)
+        if entry is not None:
+            response = remember_response(etag, entry)
+    if response is None:
+        save = save_page if page_cache_enabled(route) else None
+        response = store_response(etag, make_response(build()), on_store=save)
+    return _finish(response, etag, route)
+
+
+def apply_cache_control(response: Response, route: str) -> Response:
+    """Set the configured Cache-Control header for a route"""
+    cache_control = current_app.config['CACHE_CONTROL'].get(route)
+    if cache_control:
+        response.headers['Cache-Control'] = cache_control
+    return response
@@ -1,36 +1,126 @@
 """Markdown parsing utilities"""
-import markdown
 import os
+import html as html_lib
 import logging
 import re
+import threading
 from datetime import datetime
-from flask import current_app
+from typing import TYPE_CHECKING
+import config
+from utils.metrics import instrumented
+
+if TYPE_CHECKING:
+    import markdown
 
 logger = logging.getLogger(__name__)
+_local = threading.local()
+
+
+def get_converter() -> 'markdown.Markdown':
+    """Per-thread Markdown instance, built once with the configured extensions"""
+    md = getattr(_local, 'converter', None)
+    if md is None:
+        # Imported on first render: markdown and Pygments are not needed to boot a worker
+        import markdown
+        from utils.highlight import install_highlight_cache
+        install_highlight_cache()
+        md = markdown.Markdown(
+            extensions=[*config.MARKDOWN_EXTENSIONS, _responsive_images_extension()],
+            extension_configs=config.MARKDOWN_EXTENSION_CONFIGS
+        )
+        _local.converter = md
+    return md
+
+
+FRONT_MATTER_RE = re.compile(r'\A---[ \t]*\r?\n(.*?)^---[ \t]*(?:\r?\n|\Z)', re.S | re.M)
+
+
+def _front_matter_value(raw: str) -> str | bool | list[str]:
+    """Scalar, boolean or [a, b] list in YAML-style front matter"""
+    raw = raw.strip()
+    if raw.startswith('[') and raw.endswith(']'):
+        return [item.strip().strip('\'"') for item in raw[1:-1].split(',') if item.strip()]
+    if raw.lower() in ('true', 'yes', 'on'):
+        return True
+    if raw.lower() in ('false', 'no', 'off'):
+        return False
+    return raw.strip('\'"')
+
+
+def split_front_matter(content: str) -> tuple[dict, str]:
+    """Split a leading --- delimited front matter block from the markdown body.
 
+    Supports the YAML subset posts use: "key: value" lines, booleans,
+    [a, b] lists and "- item" list entries under an empty key. A block with
+    no "key: value" line, or with lines that are none of these, is a
+    horizontal rule rather than front matter and is left in the body.
+    """
+    match = FRONT_MATTER_RE.match(content)
+    if not match:
+        return {}, content
 
-def extract_metadata(content: str, filepath: str | None = None) -> dict[str, str | None]:
-    """Extract title and date from markdown content"""
-    title: str | None = None
+    meta: dict = {}
+    key = None
+    for line in match.group(1).splitlines():
+        if not line.strip() or line.lstrip().startswith('#'):
+            continue
+        item = re.match(r'\s*-\s+(.*)', line)
+        if item and key is not None:
+            meta.setdefault(key, [])
+            if isinstance(meta[key], list):
+                meta[key].append(item.group(1).strip().strip('\'"'))
+            continue
+        pair = re.match(r'([A-Za-z_][\w-]*)\s*:(?:\s+(.*))?$', line)
+        if not pair:
+            return {}, content
+        key = pair.group(1).lower()
+        if pair.group(2) and pair.group(2).strip():
+            meta[key] = _front_matter_value(pair.group(2))
+    if key is None:
+        return {}, content
+    return meta, content[match.end():]
+
+
+def normalize_tag(tag: str) -> str:
+    """Tags are matched case-insensitively; spaces, slashes and other URL-unsafe characters become dashes"""
+    return re.sub(r'[^\w-]+', '-', tag.strip().lower()).strip('-')
+
+
+def extract_metadata(content: str, filepath: str | None = None) -> dict:
+    """Extract title, date, tags, summary and draft flag from markdown content.
+
+    Front matter wins; otherwise the title is the first "# " heading and
+    the date the first YYYY-MM-DD near the top.
+    """
+    meta, body = split_front_matter(content) if content else ({}, '')
+    title: str | None = str(meta['title']) if meta.get('title') else None
     date: str | None = None
+    tags = meta.get('tags', [])
+    if isinstance(tags, str):
+        tags = [t for t in tags.split(',') if t.strip()]
     
-    if not content:
-        return {'title': title, 'date': date}
-    
-    for line in content.splitlines():
-        if line.startswith('# '):
-            title = line.lstrip('#').strip()
-            break
+    if title is None:
+        for line in body.splitlines():
+            if line.startswith('# '):
+                title = line.lstrip('#').strip()
+                break
     
-    date_match = re.search(r'\d{4}-\d{2}-\d{2}', content[:500])
+    date_match = re.search(r'\d{4}-\d{2}-\d{2}', str(meta.get('date', '')) or body[:500])
     if date_match:
         date = date_match.group(0)
     elif filepath and os.path.exists(filepath):
         date = datetime.fromtimestamp(os.path.getmtime(filepath)).strftime('%Y-%m-%d')
     
-    return {'title': title, 'date': date}
+    return {
+        'title': title,
+        'date': date,
+        'tags': sorted({normalize_tag(t) for t in tags if isinstance(t, str)} - {''}),
+        'summary': str(meta['summary']) if meta.get('summary') else None,
+        'draft': meta.get('draft') is True,
+    }
 
 
+@instrumented('file_read')
 def read_markdown_file(file_path: str) -> str:
     """Read markdown file content"""
     try:
@@ -43,30 +133,35 @@ def read_markdown_file(file_path: str) -> str:
         return ""
 
 
-def render_markdown(content: str, post_slug: str | None = None) -> str:
-    """Convert markdown to HTML"""
+@instrumented('markdown')
+def render_markdown(content: str, post_slug: str | None = None,
+                    image_index: dict | None = None, assets: dict | None = None) -> str:
+    """Convert markdown to HTML.
+
+    Front matter is not rendered. image_index (image_service) adds responsive
+    variants; assets (asset_service) fingerprints /static/ image URLs with
+    their content hash. Both are applied to the element tree in one pass by
+    ResponsiveImages.
+    """
     try:
-        processed = _process_image_paths(content)
-        
+        md = get_converter()
+        md.image_index, md.image_assets = image_index, assets
         try:
-            if hasattr(current_app, 'config'):
-                _validate_images_exist(processed)
-        except RuntimeError:
-            pass
-        
-        html = markdown.markdown(processed, extensions=[
-            'markdown.extensions.fenced_code',
-            'markdown.extensions.tables',
-            'markdown.extensions.codehilite',
-            'markdown.extensions.attr_list'
-        ])
-        
-        return _add_responsive_image_classes(html)
+            return md.convert(split_front_matter(content)[1])
+        finally:
+            md.reset()
+            md.image_index = md.image_assets = None
     except Exception as e:
         logger.error(f"Error rendering markdown: {e}")
         return "<p>Error rendering content</p>"
 
 
+def html_to_text(html: str) -> str:
+    """Plain text of rendered HTML, for the search index"""
+    text = re.sub(r'<[^>]+>', ' ', html)
+    return re.sub(r'\s+', ' ', html_lib.unescape(text)).strip()
+
+
 def _process_image_paths(content: str) -> str:
     """Convert relative image paths to static paths"""
     def replace_path(match: re.Match) -> str:
@@ -77,22 +172,129 @@ def _process_image_paths(content: str) -> str:
     return re.sub(r'!\[([^\]]*)\]\(([^)]+)\)', replace_path, content)
 
 
-def _validate_images_exist(content: str) -> None:
-    """Log warnings for missing images"""
-    static_dir = current_app.config.get('STATIC_DIR', '')
-    if not static_dir:
-        return
-    for _, path in re.findall(r'!\[([^\]]*)\]\((/static/[^)]+)\)', content):
-        full_path = os.path.join(static_dir, path[8:])
-        if not os.path.exists(full_path):
-            logger.warning(f"Image not found: {path}")
+def referenced_images(content: str) -> list[str]:
+    """Paths under static/ of the images a post embeds with ![alt](src) or a raw <img>"""
+    return [
+        path[len('/static/'):]
+        for _, path in re.findall(r'!\[([^\]]*)\]\((/static/[^)\s]+)', _process_image_paths(content))
+    ] + RAW_IMG_SRC_RE.findall(content)
+
+
+def find_missing_images(content: str, assets: dict | set) -> list[str]:
+    """/static/ image paths referenced by a post that are not in the asset manifest"""
+    return [f"/static/{path}" for path in referenced_images(content) if path not in assets]
+
+
+def _static_url(path: str, assets: dict | None) -> str:
+    """URL for a path under static/, with ?v=<hash> when the manifest knows it"""
+    entry = assets.get(path) if assets else None
+    return f"/static/{path}?v={entry['hash']}" if entry else f"/static/{path}"
+
+
+def _srcset(files: list[list], assets: dict | None) -> str:
+    return ', '.join(f"{_static_url('images/' + path, assets)} {width}w" for width, path in files)
+
+
+IMAGE_CLASSES = 'max-w-full h-auto rounded-lg shadow-md'
+RAW_IMG_RE = re.compile(r'<img([^>]*?)\s*/?>')
+RAW_IMG_SRC_RE = re.compile(r'<img[^>]*?\ssrc="/static/([^"?]+)"')
 
 
-def _add_responsive_image_classes(html: str) -> str:
-    """Add responsive CSS classes to images"""
-    def add_classes(match: re.Match) -> str:
+def _fix_raw_images(html: str, image_index: dict | None, assets: dict | None) -> str:
+    """The same fix-ups as ResponsiveImages for <img> tags written as raw HTML in a post"""
+    def fix(match: re.Match) -> str:
         attrs = match.group(1)
-        if 'class=' in attrs:
-            return re.sub(r'class="([^"]*)"', r'class="\1 max-w-full h-auto rounded-lg shadow-md"', f'<img{attrs}>')
-        return f'<img{attrs} class="max-w-full h-auto rounded-lg shadow-md">'
-    return re.sub(r'<img([^>]*?)>', add_classes, html)
+        src = re.search(r'src="/static/([^"?]+)"', attrs)
+        if src and assets:
+            attrs = attrs.replace(src.group(0), f'src="{_static_url(src.group(1), assets)}"', 1)
+        if 'class="' in attrs:
+            attrs = re.sub(r'class="([^"]*)"', lambda m: f'class="{m.group(1)} {IMAGE_CLASSES}"', attrs, count=1)
+        else:
+            attrs = f'{attrs} class="{IMAGE_CLASSES}"'
+        img = f'<img{attrs}>'
+        path = src.group(1) if src else ''
+        entry = image_index.get(path[len('images/'):]) if image_index and path.startswith('images/') else None
+        if not entry or entry.get('failed'):
+            return img
+        extra = [
+            f'width="{entry["width"]}"', f'height="{entry["height"]}"',
+            'loading="lazy"', 'decoding="async"', f'sizes="{config.IMAGE_SIZES}"'
+        ]
+        if entry['variants'].get('jpeg'):
+            extra.append(f'srcset="{_srcset(entry["variants"]["jpeg"], assets)}"')
+        img = f'{img[:-1]} {" ".join(extra)}>'
+        if not entry['variants'].get('webp'):
+            return img
+        source = (f'<source type="image/webp" srcset="{_srcset(entry["variants"]["webp"], assets)}" '
+                  f'sizes="{config.IMAGE_SIZES}">')
+        return f'<picture>{source}{img}</picture>'
+    return RAW_IMG_RE.sub(fix, html)
+
+
+def _responsive_images_extension():
+    """Markdown extension fixing up every <img> in a single walk of the element tree.
+
+    Relative sources are moved under /static/images/, /static/ URLs get their
+    ?v= fingerprint, the responsive classes are added, and images with
+    generated variants are wrapped in <picture> with WebP/JPEG srcsets and
+    intrinsic size. Raw HTML <img> tags, which are not part of the tree, get
+    the same treatment in the HTML stash. The per-render image_index and
+    assets are read from the Markdown instance (see render_markdown).
+    """
+    from xml.etree import ElementTree
+    from markdown.extensions import Extension
+    from markdown.treeprocessors import Treeprocessor
+
+    class ResponsiveImages(Treeprocessor):
+        def run(self, root: ElementTree.Element) -> None:
+            image_index = getattr(self.md, 'image_index', None)
+            assets = getattr(self.md, 'image_assets', None)
+            images = [(parent, i, child) for parent in root.iter() for i, child in enumerate(parent)
+                      if child.tag == 'img']
+            for parent, i, img in images:
+                picture = self._fix_image(img, image_index, assets)
+                if picture is not None:
+                    parent[i] = picture
+            stash = self.md.htmlStash.rawHtmlBlocks
+            for i, block in enumerate(stash):
+                if isinstance(block, str) and '<img' in block:
+                    stash[i] = _fix_raw_images(block, image_index, assets)
+
+        def _fix_image(self, img: ElementTree.Element, image_index: dict | None,
+                       assets: dict | None) -> ElementTree.Element | None:
+            src = img.get('src', '')
+            if src and not src.startswith(('/static/', 'http')):
+                src = f"/static/images/{src.lstrip('./')}"
+            path = src[len('/static/'):] if src.startswith('/static/') and '?' not in src else None
+            if path is not None:
+                src = _static_url(path, assets)
+            img.set('src', src)
+            img.set('class', f"{img.get('class')} {IMAGE_CLASSES}" if img.get('class') else IMAGE_CLASSES)
+
+            entry = image_index.get(path[len('images/'):]) if image_index and path and path.startswith('images/') else None
+            if not entry or entry.get('failed'):
+                return None
+            img.set('width', str(entry['width']))
+            img.set('height', str(entry['height']))
+            img.set('loading', 'lazy')
+            img.set('decoding', 'async')
+            img.set('sizes', config.IMAGE_SIZES)
+            if entry['variants'].get('jpeg'):
+                img.set('srcset', _srcset(entry['variants']['jpeg'], assets))
+            if not entry['variants'].get('webp'):
+                return None
+            picture = ElementTree.Element('picture')
+            ElementTree.SubElement(picture, 'source', {
+                'type': 'image/webp', 'srcset': _srcset(entry['variants']['webp'], assets),
+                'sizes': config.IMAGE_SIZES,
+            })
+            picture.append(img)
+            picture.tail, img.tail = img.tail, None
+            return picture
+
+    class ResponsiveImagesExtension(Extension):
+        def extendMarkdown(self, md) -> None:
+            # After inline patterns (priority 20) have produced the <img> elements
+            md.treeprocessors.register(ResponsiveImages(md), 'responsive_images', 5)
+
+    return ResponsiveImagesExtension()
@@ -0,0 +1,193 @@
+"""Request and hot-path instrumentation: Prometheus /metrics and Server-Timing.
+
+Disabled unless METRICS_ENABLED is set; instrumented() then costs one
+flag check. Metrics are kept per worker process.
+"""
+import os
+import time
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+from functools import wraps
+from typing import Callable, Iterator
+from flask import Flask, Response, g, has_request_context, request
+from flask.signals import before_render_template, template_rendered
+
+logger = logging.getLogger(__name__)
+
+_state: dict = {'enabled': False, 'buckets': []}
+_lock = threading.Lock()
+# name -> {labels tuple: [bucket counts..., sum, count]}
+_histograms: dict[str, dict[tuple, list]] = {}
+_counters: dict[str, dict[tuple, float]] = {}
+_HELP = {
+    'blog_request_duration_seconds': 'Time to handle a request, by route',
+    'blog_phase_duration_seconds': 'Time spent per phase (db, file_read, markdown, template) per request',
+    'blog_sync_phase_duration_seconds': 'Duration of each sync phase',
+    'blog_requests_total': 'Requests handled, by route and status',
+}
+
+
+def is_enabled() -> bool:
+    return _state['enabled']
+
+
+def observe(name: str, seconds: float, **labels: str) -> None:
+    """Add one observation to a histogram"""
+    key = tuple(sorted(labels.items()))
+    buckets = _state['buckets']
+    with _lock:
+        series = _histograms.setdefault(name, {})
+        values = series.get(key)
+        if values is None:
+            values = series[key] = [0] * (len(buckets) + 2)
+        for i, bound in enumerate(buckets):
+            if seconds <= bound:
+                values[i] += 1
+        values[-2] += seconds
+        values[-1] += 1
+
+
+def increment(name: str, **labels: str) -> None:
+    key = tuple(sorted(labels.items()))
+    with _lock:
+        series = _counters.setdefault(name, {})
+        series[key] = series.get(key, 0) + 1
+
+
+def _record(phase: str, seconds: float) -> None:
+    if has_request_context():
+        timings = g.setdefault('timings', {})
+        timings[phase] = timings.get(phase, 0.0) + seconds
+    else:
+        observe('blog_phase_duration_seconds', seconds, route='background', phase=phase)
+
+
+@contextmanager
+def _timer(phase: str) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        _record(phase, time.perf_counter() - started)
+
+
+def instrumented(phase: str) -> Callable:
+    """Decorator timing every call of a function as the phase"""
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _state['enabled']:
+                return func(*args, **kwargs)
+            with _timer(phase):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class TimedCursor(sqlite3.Cursor):
+    """Cursor whose statement execution and row fetching count as the db phase"""
+
+    def execute(self, *args):
+        with _timer('db'):
+            return super().execute(*args)
+
+    def executemany(self, *args):
+        with _timer('db'):
+            return super().executemany(*args)
+
+    def fetchone(self):
+        with _timer('db'):
+            return super().fetchone()
+
+    def fetchall(self):
+        with _timer('db'):
+            return super().fetchall()
+
+
+class TimedConnection(sqlite3.Connection):
+    """Connection factory used by the pool while metrics are enabled"""
+
+    def execute(self, *args):
+        return self.cursor(TimedCursor).execute(*args)
+
+    def executemany(self, *args):
+        return self.cursor(TimedCursor).executemany(*args)
+
+
+def connection_factory() -> type[sqlite3.Connection]:
+    return TimedConnection if _state['enabled'] else sqlite3.Connection
+
+
+def _start_request() -> None:
+    g.request_started = time.perf_counter()
+
+
+def _finish_request(response: Response) -> Response:
+    started = g.pop('request_started', None)
+    if started is None:
+        return response
+    total = time.perf_counter() - started
+    route = request.endpoint or 'unmatched'
+    timings = g.pop('timings', {})
+    for phase, seconds in timings.items():
+        observe('blog_phase_duration_seconds', seconds, route=route, phase=phase)
+    observe('blog_request_duration_seconds', total, route=route)
+    increment('blog_requests_total', route=route, status=str(response.status_code))
+    response.headers['Server-Timing'] = ', '.join(
+        [f"{phase};dur={seconds * 1000:.2f}" for phase, seconds in timings.items()]
+        + [f"total;dur={total * 1000:.2f}"]
+    )
+    return response
+
+
+def _template_started(app: Flask, template, context: dict) -> None:
+    g.template_started = time.perf_counter()
+
+
+def _template_finished(app: Flask, template, context: dict) -> None:
+    started = g.pop('template_started', None)
+    if started is not None:
+        _record('template', time.perf_counter() - started)
+
+
+def _labels(key: tuple, **extra: str) -> str:
+    pairs = [*key, *extra.items()]
+    return '{' + ','.join(f'{k}="{v}"' for k, v in pairs) + '}' if pairs else ''
+
+
+def render_metrics() -> str:
+    """All metrics of this worker in the Prometheus text format"""
+    lines = []
+    with _lock:
+        for name, series in sorted(_histograms.items()):
+            lines += [f"# HELP {name} {_HELP.get(name, name)}", f"# TYPE {name} histogram"]
+            for key, values in sorted(series.items()):
+                for bound, count in zip(_state['buckets'], values):
+                    lines.append(f"{name}_bucket{_labels(key, le=repr(float(bound)))} {count}")
+                lines.append(f"{name}_bucket{_labels(key, le='+Inf')} {values[-1]}")
+                lines.append(f"{name}_sum{_labels(key)} {values[-2]:.6f}")
+                lines.append(f"{name}_count{_labels(key)} {values[-1]}")
+        for name, series in sorted(_counters.items()):
+            lines += [f"# HELP {name} {_HELP.get(name, name)}", f"# TYPE {name} counter"]
+            lines += [f"{name}{_labels(key)} {value}" for key, value in sorted(series.items())]
+    lines += ['# HELP blog_worker_pid Process id of the worker that served this scrape',
+              '# TYPE blog_worker_pid gauge', f"blog_worker_pid {os.getpid()}"]
+    return '\n'.join(lines) + '\n'
+
+
+def init_metrics(app: Flask) -> None:
+    """Enable instrumentation and /metrics when METRICS_ENABLED is set"""
+    if not app.config['METRICS_ENABLED']:
+        return
+    _state.update(enabled=True, buckets=sorted(app.config['METRICS_BUCKETS']))
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    before_render_template.connect(_template_started, app)
+    template_rendered.connect(_template_finished, app)
+    app.add_url_rule(
+        '/metrics', 'metrics',
+        lambda: Response(render_metrics(), mimetype='text/plain; version=0.0.4')
+    )
+    logger.info("Request metrics enabled at /metrics")
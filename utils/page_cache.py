@@ -0,0 +1,123 @@
+"""Whole-page cache shared by all workers, kept in its own SQLite file.
+
+Pages are stored by path plus the query arguments routes read, and ETag.
+ETags already change with the sync generation (listings) or the post's
+render hash, so a page rendered before a sync can never be served after
+it; rows left behind by older generations are purged by the sync that
+replaced them, and the oldest pages are evicted past PAGE_CACHE_MAX_BYTES.
+"""
+import sqlite3
+import logging
+from urllib.parse import urlencode
+from flask import current_app, request
+from utils.db import get_pool, get_sync_generation
+
+logger = logging.getLogger(__name__)
+
+
+def page_cache_enabled(route: str) -> bool:
+    """True if whole pages of this route are shared between workers"""
+    return current_app.config['PAGE_CACHE'] and route in current_app.config['PAGE_CACHE_ROUTES']
+
+
+def _page_key() -> str | None:
+    """Path and known query arguments of this request, or None if it has any other argument"""
+    known = current_app.config['PAGE_CACHE_QUERY_ARGS']
+    if any(name not in known for name in request.args):
+        return None
+    args = sorted((name, value) for name in known for value in request.args.getlist(name))
+    return f"{request.path}?{urlencode(args)}" if args else request.path
+
+
+def init_page_cache() -> None:
+    """Create the page store"""
+    pool = get_pool(path=current_app.config['PAGE_CACHE_PATH'])
+    db = pool.acquire()
+    try:
+        db.execute("""
+            CREATE TABLE IF NOT EXISTS pages (
+                path TEXT PRIMARY KEY,
+                etag TEXT,
+                generation INTEGER,
+                mimetype TEXT,
+                body BLOB
+            )
+        """)
+        db.commit()
+    finally:
+        pool.release(db)
+
+
+def load_page(etag: str) -> dict | None:
+    """Stored page for this request's URL and ETag, as a response cache entry"""
+    key = _page_key()
+    if key is None:
+        return None
+    pool = get_pool(path=current_app.config['PAGE_CACHE_PATH'])
+    db = pool.acquire()
+    try:
+        row = db.execute(
+            "SELECT mimetype, body FROM pages WHERE path = ? AND etag = ?", [key, etag]
+        ).fetchone()
+    except sqlite3.Error as e:
+        logger.error(f"Error reading page cache: {e}")
+        return None
+    finally:
+        pool.release(db)
+    return {'mimetype': row[0], 'identity': row[1]} if row else None
+
+
+def save_page(etag: str, entry: dict) -> None:
+    """Store a rendered page for every worker, tagged with the current sync generation"""
+    key = _page_key()
+    if key is None:
+        return
+    pool = get_pool(path=current_app.config['PAGE_CACHE_PATH'])
+    db = pool.acquire()
+    try:
+        with db:
+            db.execute(
+                "INSERT OR REPLACE INTO pages (path, etag, generation, mimetype, body) VALUES (?, ?, ?, ?, ?)",
+                [key, etag, get_sync_generation(), entry['mimetype'], entry['identity']]
+            )
+            # Replaced rows get a new rowid, so rowid order is storage order
+            db.execute(
+                "DELETE FROM pages WHERE rowid IN (SELECT rowid FROM ("
+                "SELECT rowid, SUM(LENGTH(body)) OVER (ORDER BY rowid DESC) AS total FROM pages"
+                ") WHERE total > ?)",
+                [current_app.config['PAGE_CACHE_MAX_BYTES']]
+            )
+    except sqlite3.Error as e:
+        # Another worker holding the write lock is not worth failing the request over
+        logger.debug(f"Page not cached: {e}")
+    finally:
+        pool.release(db)
+
+
+def purge_page_cache(generation: int) -> None:
+    """Drop pages rendered before the given sync generation"""
+    if not current_app.config['PAGE_CACHE']:
+        return
+    pool = get_pool(path=current_app.config['PAGE_CACHE_PATH'])
+    db = pool.acquire()
+    try:
+        with db:
+            deleted = db.execute("DELETE FROM pages WHERE generation < ?", [generation]).rowcount
+        logger.debug(f"Page cache: purged {deleted} pages older than generation {generation}")
+    except sqlite3.Error as e:
+        logger.error(f"Error purging page cache: {e}")
+    finally:
+        pool.release(db)
+
+
+def page_cache_stats() -> dict:
+    """Number and total size of stored pages"""
+    if not current_app.config['PAGE_CACHE']:
+        return {'enabled': False}
+    pool = get_pool(path=current_app.config['PAGE_CACHE_PATH'])
+    db = pool.acquire()
+    try:
+        count, size = db.execute("SELECT COUNT(*), COALESCE(SUM(LENGTH(body)), 0) FROM pages").fetchone()
+    finally:
+        pool.release(db)
+    return {'enabled': True, 'pages': count, 'bytes': size}
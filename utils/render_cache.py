@@ -0,0 +1,86 @@
+"""In-process LRU caches for rendered posts and pages"""
+import os
+import threading
+from collections import OrderedDict
+from typing import Hashable
+
+
+class RenderCache:
+    """LRU cache of rendered output bounded by total size in bytes.
+
+    Entries are keyed by a string (a file path for posts) and validated
+    against a version, e.g. the file's (mtime_ns, size), so an edited post
+    is re-rendered on the next request. Only str/bytes values count
+    towards the size.
+    """
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024) -> None:
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, tuple[Hashable, dict, int]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def file_version(filepath: str) -> tuple[int, int] | None:
+        """Return the (mtime_ns, size) version of a file, or None if missing"""
+        try:
+            st = os.stat(filepath)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def get(self, filepath: str, version: Hashable | None) -> dict | None:
+        """Return the cached entry for filepath if it matches version"""
+        with self._lock:
+            entry = self._entries.get(filepath)
+            if entry is None or version is None or entry[0] != version:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(filepath)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, filepath: str, version: Hashable | None, value: dict) -> None:
+        """Store a rendered entry, evicting least recently used ones over budget"""
+        if version is None:
+            return
+        size = sum(
+            len(v.encode('utf-8')) if isinstance(v, str) else len(v)
+            for v in value.values() if isinstance(v, (str, bytes))
+        )
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(filepath, None)
+            if old:
+                self.current_bytes -= old[2]
+            self._entries[filepath] = (version, value, size)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop all entries (counters are kept)"""
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self) -> dict[str, int]:
+        """Return cache counters for ops"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self.current_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+
+render_cache = RenderCache()
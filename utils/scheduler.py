@@ -1,27 +1,91 @@
-"""Scheduler for periodic post sync"""
+"""Background post sync: inotify watcher with interval polling as fallback.
+
+Nothing here blocks worker boot: the initial sync runs in a thread, and
+APScheduler is only imported when polling is actually needed. Under
+gunicorn --preload, create_app runs with SYNC_AUTOSTART off and
+gunicorn.conf.py calls start_background_sync in each worker after fork;
+the file lock lets exactly one of them sync.
+"""
+import os
+import time
+import fcntl
 import logging
+import threading
+from typing import IO
 from flask import Flask
-from flask_apscheduler import APScheduler
-from services.sync_service import sync_posts_to_db
+from services.sync_service import DRIFT_QUEUE_NAME, record_sync_leader, sync_posts_to_db
+from utils.watcher import DirectoryWatcher, inotify_available
+import config
 
 logger = logging.getLogger(__name__)
-scheduler = APScheduler()
+scheduler = None
+watchers: list[DirectoryWatcher] = []
+_lock_file: IO | None = None
+_sync_lock = threading.Lock()
+_app: Flask | None = None
 
+SYNC_MODES = {'auto', 'inotify', 'poll', 'off'}
 
-def _run_sync() -> None:
-    """Run post sync within app context"""
-    with scheduler.app.app_context():
-        sync_posts_to_db()
 
+def _run_sync(filenames: set[str] | None = None) -> None:
+    """Run post sync within app context, one run at a time"""
+    with _sync_lock, _app.app_context():
+        sync_posts_to_db(filenames=filenames, jobs=_app.config['SYNC_JOBS'])
 
-def init_scheduler(app: Flask) -> None:
-    """Initialize scheduler - only runs in first worker"""
-    app.config.setdefault('SCHEDULER_API_ENABLED', False)
-    app.config.setdefault('POSTS_CHECK_INTERVAL', 60)
-    
-    scheduler.init_app(app)
-    scheduler.app = app
-    
+
+def _acquire_sync_lock(lock_path: str) -> bool:
+    """Try to become the single syncing process; the lock lives as long as the process"""
+    global _lock_file
+    if _lock_file is not None:
+        return True
+    os.makedirs(os.path.dirname(lock_path), exist_ok=True)
+    lock_file = open(lock_path, 'a')
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return False
+    _lock_file = lock_file
+    return True
+
+
+def _start_watcher(app: Flask) -> bool:
+    """Start inotify watchers, returning False if they are unavailable.
+
+    Post changes sync just the affected files; image changes trigger a full
+    sync so variants are regenerated and embedding posts re-rendered. Posts
+    queued for title drift by any worker are synced as soon as they appear.
+    """
+    if watchers:
+        return True
+    if not inotify_available():
+        return False
+    debounce = app.config['SYNC_DEBOUNCE_SECONDS']
+    try:
+        watchers.append(DirectoryWatcher(app.config['POSTS_DIR'], _run_sync, debounce=debounce, suffix='.md'))
+        images_dir = os.path.join(app.config['STATIC_DIR'], 'images')
+        if os.path.isdir(images_dir):
+            watchers.append(DirectoryWatcher(images_dir, lambda _: _run_sync(), debounce=debounce))
+        watchers.append(DirectoryWatcher(
+            os.path.dirname(app.config['DATABASE']), lambda _: _run_sync(set()),
+            debounce=debounce, suffix=DRIFT_QUEUE_NAME
+        ))
+        for w in watchers:
+            w.start()
+    except OSError as e:
+        logger.warning(f"inotify watcher unavailable, falling back to polling: {e}")
+        watchers.clear()
+        return False
+    return True
+
+
+def _start_polling(app: Flask) -> None:
+    """Schedule the interval sync job"""
+    global scheduler
+    if scheduler is None:
+        from flask_apscheduler import APScheduler
+        scheduler = APScheduler()
+        scheduler.init_app(app)
     scheduler.add_job(
         id='sync_posts',
         func=_run_sync,
@@ -30,9 +94,62 @@ def init_scheduler(app: Flask) -> None:
         max_instances=1,
         replace_existing=True
     )
-    
     if not scheduler.running:
         scheduler.start()
-    
+
+
+def _start_sync(app: Flask) -> None:
+    """Initial full sync followed by watching or polling, in the lock holder only"""
+    mode = app.config['SYNC_MODE']
     with app.app_context():
-        sync_posts_to_db()
+        record_sync_leader()
+    _run_sync()
+
+    if mode in ('auto', 'inotify') and _start_watcher(app):
+        logger.info(f"Watching {app.config['POSTS_DIR']} for changes (pid {os.getpid()})")
+        return
+    if mode == 'inotify':
+        logger.warning("SYNC_MODE is 'inotify' but inotify is unavailable; polling instead")
+    _start_polling(app)
+    logger.info(f"Polling {app.config['POSTS_DIR']} every {app.config['POSTS_CHECK_INTERVAL']}s (pid {os.getpid()})")
+
+
+def _wait_for_lock(app: Flask, lock_path: str) -> None:
+    """Take over syncing if the current lock holder exits"""
+    while True:
+        time.sleep(app.config['POSTS_CHECK_INTERVAL'])
+        if _acquire_sync_lock(lock_path):
+            _start_sync(app)
+            return
+
+
+def start_background_sync(app: Flask) -> None:
+    """Start background sync in exactly one process, guarded by a file lock.
+
+    Returns immediately; the lock holder syncs and watches in a thread.
+    """
+    global _app
+    if app.config['SYNC_MODE'] == 'off' or _app is not None:
+        return
+    _app = app
+
+    lock_path = os.path.join(os.path.dirname(app.config['DATABASE']), 'sync.lock')
+    if _acquire_sync_lock(lock_path):
+        threading.Thread(target=_start_sync, args=(app,), name='sync-start', daemon=True).start()
+    else:
+        threading.Thread(target=_wait_for_lock, args=(app, lock_path), name='sync-lock-wait', daemon=True).start()
+
+
+def init_scheduler(app: Flask) -> None:
+    """Validate sync settings and, unless SYNC_AUTOSTART is off, start background sync"""
+    app.config.setdefault('SCHEDULER_API_ENABLED', False)
+    app.config.setdefault('POSTS_CHECK_INTERVAL', 60)
+    app.config.setdefault('SYNC_MODE', config.SYNC_MODE)
+    app.config.setdefault('SYNC_DEBOUNCE_SECONDS', config.SYNC_DEBOUNCE_SECONDS)
+    app.config.setdefault('SYNC_AUTOSTART', True)
+    app.config.setdefault('SYNC_JOBS', config.SYNC_JOBS)
+
+    if app.config['SYNC_MODE'] not in SYNC_MODES:
+        raise ValueError(f"Unknown SYNC_MODE {app.config['SYNC_MODE']!r}, expected one of {sorted(SYNC_MODES)}")
+    if app.config['SYNC_AUTOSTART']:
+        start_background_sync(app)
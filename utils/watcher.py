@@ -0,0 +1,130 @@
+"""inotify-based directory watcher (Linux only, via ctypes)"""
+import os
+import time
+import errno
+import select
+import struct
+import logging
+import threading
+import ctypes
+import ctypes.util
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+              | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF)
+EVENT_HEADER = struct.Struct('iIII')
+
+_libc = None
+
+
+def _load_libc() -> ctypes.CDLL | None:
+    """Load libc with the inotify symbols, or None if unsupported"""
+    global _libc
+    if _libc is None:
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+            libc.inotify_init1, libc.inotify_add_watch
+            _libc = libc
+        except (OSError, AttributeError):
+            _libc = False
+    return _libc or None
+
+
+def inotify_available() -> bool:
+    """True when the platform supports inotify"""
+    return _load_libc() is not None
+
+
+class DirectoryWatcher:
+    """Watch a directory and report changed filenames after a quiet period.
+
+    The callback receives the set of changed names, or None when the
+    event queue overflowed and the caller should rescan everything.
+    """
+
+    def __init__(self, path: str, callback: Callable[[set[str] | None], None],
+                 debounce: float = 0.25, suffix: str = '') -> None:
+        self.path = path
+        self.callback = callback
+        self.debounce = debounce
+        self.suffix = suffix
+        self._fd: int | None = None
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        """Register the inotify watch and start the reader thread"""
+        libc = _load_libc()
+        if libc is None:
+            raise OSError(errno.ENOSYS, "inotify is not available")
+
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        if libc.inotify_add_watch(fd, os.fsencode(self.path), WATCH_MASK) < 0:
+            err = ctypes.get_errno()
+            os.close(fd)
+            raise OSError(err, f"inotify_add_watch failed for {self.path}")
+
+        self._fd = fd
+        self._thread = threading.Thread(target=self._run, name='posts-watcher', daemon=True)
+        self._thread.start()
+
+    def _read_events(self) -> tuple[set[str], bool]:
+        """Drain pending events, returning (names, needs_full_rescan)"""
+        names: set[str] = set()
+        rescan = False
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return names, rescan
+
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            _, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0').decode('utf-8', 'replace')
+            offset += length
+
+            if mask & (IN_Q_OVERFLOW | IN_DELETE_SELF | IN_MOVE_SELF):
+                rescan = True
+            elif name and name.endswith(self.suffix):
+                names.add(name)
+        return names, rescan
+
+    def _run(self) -> None:
+        """Collect events and fire the callback once bursts settle"""
+        pending: set[str] = set()
+        rescan = False
+        deadline: float | None = None
+
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            ready, _, _ = select.select([self._fd], [], [], timeout)
+
+            if ready:
+                names, overflow = self._read_events()
+                if names or overflow:
+                    pending |= names
+                    rescan = rescan or overflow
+                    deadline = time.monotonic() + self.debounce
+                continue
+
+            try:
+                self.callback(None if rescan else pending)
+            except Exception as e:
+                logger.error(f"Watcher callback failed: {e}")
+            pending, rescan, deadline = set(), False, None
@@ -1,12 +1,16 @@
 #!/usr/bin/env python3
 """
 Script to verify post files are properly formatted.
-Usage: python verify_posts.py [posts_directory]
+Usage: python verify_posts.py [posts_directory] [--jobs N]
 """
 import os
 import sys
+import time
 import logging
-from utils.markdown_parser import read_markdown_file, render_markdown, extract_metadata
+import argparse
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+from utils.markdown_parser import read_markdown_file, render_markdown, extract_metadata, find_missing_images
 
 logging.basicConfig(
     level=logging.INFO,
@@ -15,9 +19,18 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 DEFAULT_POSTS_DIR = "posts"
+DEFAULT_STATIC_DIR = "static"
 
 
-def verify_post(file_path: str) -> bool:
+def _list_static_files(static_dir: str) -> set[str]:
+    """Paths of all files under the static directory, relative to it"""
+    return {
+        os.path.relpath(os.path.join(root, name), static_dir).replace(os.sep, '/')
+        for root, _, files in os.walk(static_dir) for name in files
+    }
+
+
+def verify_post(file_path: str, static_files: set[str] | None = None) -> bool:
     """Verify a post file's content and format"""
     logger.info(f"Verifying: {file_path}")
     
@@ -36,6 +49,11 @@ def verify_post(file_path: str) -> bool:
         logger.error(f"No title (# heading) found: {file_path}")
         return False
     
+    # Referenced images are only warned about, as before
+    if static_files is not None:
+        for path in find_missing_images(content, static_files):
+            logger.warning(f"Image not found: {path} ({file_path})")
+    
     # Try rendering
     try:
         html = render_markdown(content)
@@ -52,7 +70,12 @@ def verify_post(file_path: str) -> bool:
 
 def main():
     """Verify all markdown files in posts directory"""
-    posts_dir = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_POSTS_DIR
+    parser = argparse.ArgumentParser(description="Verify post files are properly formatted")
+    parser.add_argument('posts_dir', nargs='?', default=DEFAULT_POSTS_DIR)
+    parser.add_argument('--jobs', '-j', type=int, default=1, help="processes used to render posts")
+    parser.add_argument('--static-dir', default=DEFAULT_STATIC_DIR, help="where referenced images are looked up")
+    args = parser.parse_args()
+    posts_dir = args.posts_dir
     
     if not os.path.exists(posts_dir):
         logger.error(f"Directory not found: {posts_dir}")
@@ -65,10 +88,19 @@ def main():
     
     logger.info(f"Found {len(md_files)} markdown files")
     
-    failed = []
-    for filename in md_files:
-        if not verify_post(os.path.join(posts_dir, filename)):
-            failed.append(filename)
+    paths = [os.path.join(posts_dir, f) for f in md_files]
+    verify = partial(verify_post, static_files=_list_static_files(args.static_dir))
+    started = time.perf_counter()
+    if args.jobs > 1:
+        with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+            results = list(pool.map(verify, paths, chunksize=max(1, len(paths) // (args.jobs * 4))))
+    else:
+        results = [verify(path) for path in paths]
+    elapsed = time.perf_counter() - started
+    
+    failed = [f for f, ok in zip(md_files, results) if not ok]
+    logger.info(f"Verified {len(paths)} files in {elapsed:.2f}s "
+                f"({len(paths) / max(elapsed, 1e-9):.1f} files/s, {args.jobs} jobs)")
     
     if failed:
         logger.error(f"Failed: {', '.join(failed)}")